@@ -0,0 +1,106 @@
+"""Requests per second on one event loop: sync Session vs AsyncSession.
+
+Serves the same service listing query three ways from one in-process app
+and drives each with concurrent clients:
+
+- blocking: async def handler on the sync Session (the old routes)
+- threadpool: def handler on the sync Session
+- async: async def handler on the AsyncSession
+
+Uses URL_DATABASE / ASYNC_URL_DATABASE like the app, so point it at the
+local SQLite file or a Postgres/MySQL instance with data in it:
+
+    python -m benchmarks.async_db_throughput --concurrency 10 --seconds 5
+
+Keep the concurrency within the sync pool size (5 + 10 overflow): past it
+the blocking variant waits for a connection on the event loop itself,
+which no other request can release, and stalls until the pool timeout.
+"""
+
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select
+from config.database import async_db_dependency, db_dependency
+import main  # noqa: F401 registers every mapper, like the app does
+from models.professional_services import ProfessionalService
+from utils.loaders_handler import service_load_options
+
+PAGE_SIZE = 15
+
+app = FastAPI()
+
+
+@app.get("/blocking")
+async def blocking(db: db_dependency):
+    services = (
+        db.query(ProfessionalService)
+        .options(*service_load_options())
+        .order_by(ProfessionalService.id)
+        .limit(PAGE_SIZE)
+        .all()
+    )
+    return len(services)
+
+
+@app.get("/threadpool")
+def threadpool(db: db_dependency):
+    services = (
+        db.query(ProfessionalService)
+        .options(*service_load_options())
+        .order_by(ProfessionalService.id)
+        .limit(PAGE_SIZE)
+        .all()
+    )
+    return len(services)
+
+
+@app.get("/async")
+async def async_session(db: async_db_dependency):
+    services = (
+        await db.scalars(
+            select(ProfessionalService)
+            .options(*service_load_options())
+            .order_by(ProfessionalService.id)
+            .limit(PAGE_SIZE)
+        )
+    ).all()
+    return len(services)
+
+
+async def drive(client: httpx.AsyncClient, path: str, concurrency: int, seconds: float):
+    done = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            response = await client.get(path)
+            response.raise_for_status()
+            done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done / (time.perf_counter() - started)
+
+
+async def main(concurrency: int, seconds: float):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for path in ("/blocking", "/threadpool", "/async"):
+            # Warm up pools and mapper configuration
+            await drive(client, path, concurrency, 0.5)
+            rps = await drive(client, path, concurrency, seconds)
+            print(f"{path:<12} {rps:8.1f} req/s  (concurrency {concurrency})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.seconds))
@@ -0,0 +1,46 @@
+"""bcrypt throughput per cost, to size login capacity.
+
+Reports hashes per second on one core and across all cores (one thread per
+core, bcrypt releases the GIL). Run from the project root:
+
+    python -m benchmarks.bcrypt_cost --min-rounds 10 --max-rounds 13
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.password_handler import BCRYPT_ROUNDS, hash_password
+
+PASSWORD = "benchmark-password"
+
+
+def hashes_per_second(rounds: int, hashes: int, workers: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda _: hash_password(PASSWORD, rounds), range(hashes)))
+    return hashes / (time.perf_counter() - started)
+
+
+def main(min_rounds: int, max_rounds: int, seconds: float):
+    cores = os.cpu_count() or 1
+    print(f"cores {cores}, current BCRYPT_ROUNDS {BCRYPT_ROUNDS}")
+    print(f"{'rounds':>6} {'ms/hash':>9} {'hash/s/core':>12} {'hash/s all':>11}")
+    for rounds in range(min_rounds, max_rounds + 1):
+        # Calibrate the sample size so each cost takes about `seconds`
+        single = hashes_per_second(rounds, 1, 1)
+        hashes = max(1, int(single * seconds))
+        per_core = hashes_per_second(rounds, hashes, 1)
+        all_cores = hashes_per_second(rounds, hashes * cores, cores)
+        print(
+            f"{rounds:>6} {1000 / per_core:>9.1f} {per_core:>12.1f} {all_cores:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=13)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    main(args.min_rounds, args.max_rounds, args.seconds)
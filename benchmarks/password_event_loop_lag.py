@@ -0,0 +1,75 @@
+"""Event-loop lag while bcrypt runs for a burst of concurrent logins.
+
+Compares calling verify_password on the loop (the old handlers) against
+verify_password_async. Run from the project root:
+
+    python -m benchmarks.password_event_loop_lag --logins 32
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from utils.password_handler import (
+    hash_password,
+    verify_password,
+    verify_password_async,
+)
+
+TICK_SECONDS = 0.005
+
+
+async def measure_lag(stop: asyncio.Event, lags: list):
+    # Every tick should wake up after TICK_SECONDS, anything more is lag
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append((time.perf_counter() - started - TICK_SECONDS) * 1000)
+
+
+async def blocking_login(password: str, hashed: str):
+    verify_password(password, hashed)
+
+
+async def offloaded_login(password: str, hashed: str):
+    await verify_password_async(password, hashed)
+
+
+async def run(login, logins: int, password: str, hashed: str):
+    stop = asyncio.Event()
+    lags = []
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+    await asyncio.sleep(TICK_SECONDS * 2)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    return elapsed, lags
+
+
+def report(name: str, elapsed: float, lags: list):
+    lags = sorted(lags)
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(
+        f"{name:<10} total {elapsed * 1000:8.1f} ms  "
+        f"lag median {statistics.median(lags):7.1f} ms  "
+        f"p99 {p99:7.1f} ms  max {lags[-1]:7.1f} ms  ticks {len(lags)}"
+    )
+
+
+async def main(logins: int):
+    password = "benchmark-password"
+    hashed = hash_password(password).decode("utf-8")
+
+    report("blocking", *await run(blocking_login, logins, password, hashed))
+    report("offloaded", *await run(offloaded_login, logins, password, hashed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
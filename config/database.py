@@ -1,19 +1,135 @@
+from contextlib import contextmanager
 from datetime import date
 from typing import Annotated
-from fastapi import Depends
-from sqlalchemy import create_engine
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, insert, inspect, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
+from utils.geo_handler import haversine_km
+from utils.pool_stats_handler import instrumented_pool_class, listen_pool_events
 import os
+import random
+import tempfile
+import zlib
 
 load_dotenv()
 
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    # mysql+pymysql://... -> mysql+aiomysql://..., same host and credentials
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(
+        hide_password=False
+    )
+
+
 URL_DATABASE = os.getenv("URL_DATABASE")
+ASYNC_URL_DATABASE = os.getenv("ASYNC_URL_DATABASE") or to_async_url(URL_DATABASE)
+
+# Per engine and per worker process: a worker can hold up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections on each engine.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Recycle before the server's idle timeout drops the connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(
+    URL_DATABASE,
+    poolclass=instrumented_pool_class(QueuePool, "primary"),
+    **pool_options(),
+)
+async_engine = create_async_engine(
+    ASYNC_URL_DATABASE,
+    poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, "primary_async"),
+    **pool_options(),
+)
+listen_pool_events(engine, "primary")
+listen_pool_events(async_engine.sync_engine, "primary_async")
+
+# Comma separated; read-only routes are spread across these when set
+REPLICA_URL_DATABASES = [
+    url.strip()
+    for url in os.getenv("REPLICA_URL_DATABASES", "").split(",")
+    if url.strip()
+]
+# After a write the client reads from the primary for this long, so it sees
+# its own changes while the replicas catch up
+PRIMARY_PIN_SECONDS = int(os.getenv("PRIMARY_PIN_SECONDS", 5))
+PRIMARY_PIN_COOKIE = "db_primary_pin"
+
+
+def create_replica_engine(index: int, url: str):
+    name = f"replica_{index}_async"
+    replica_engine = create_async_engine(
+        to_async_url(url),
+        poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, name),
+        **pool_options(),
+    )
+    listen_pool_events(replica_engine.sync_engine, name)
+    return replica_engine
+
+
+replica_async_engines = [
+    create_replica_engine(index, url) for index, url in enumerate(REPLICA_URL_DATABASES)
+]
+
+# Engines reported by the internal pool stats endpoint
+ENGINES = {
+    "primary": engine,
+    "primary_async": async_engine.sync_engine,
+    **{
+        f"replica_{index}_async": replica_engine.sync_engine
+        for index, replica_engine in enumerate(replica_async_engines)
+    },
+}
+
 
-engine = create_engine(URL_DATABASE)
+def register_sqlite_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function(
+        "haversine_km", 4, haversine_km, deterministic=True
+    )
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", register_sqlite_functions)
+    event.listen(async_engine.sync_engine, "connect", register_sqlite_functions)
+for replica_engine in replica_async_engines:
+    if replica_engine.dialect.name == "sqlite":
+        event.listen(replica_engine.sync_engine, "connect", register_sqlite_functions)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Nothing may lazy load outside the session's greenlet, so objects must stay
+# readable after commit
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+ReplicaSessionLocals = [
+    async_sessionmaker(bind=replica_engine, autoflush=False, expire_on_commit=False)
+    for replica_engine in replica_async_engines
+]
 
 Base = declarative_base()
 
@@ -29,6 +145,31 @@ def get_db():
 db_dependency = Annotated[Session, Depends(get_db)]
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    return PRIMARY_PIN_COOKIE in request.cookies
+
+
+async def get_async_read_db(request: Request):
+    # Read-only routes only; anything that writes must use the primary
+    if ReplicaSessionLocals and not is_pinned_to_primary(request):
+        session_local = random.choice(ReplicaSessionLocals)
+    else:
+        session_local = AsyncSessionLocal
+    async with session_local() as db:
+        yield db
+
+
+async_read_db_dependency = Annotated[AsyncSession, Depends(get_async_read_db)]
+
+
 DEFAULT_CATEGORIES = [
     {
         "name": "Health",
@@ -73,62 +214,141 @@ DEFAULT_CATEGORIES = [
 ]
 
 
-def init_db():
+SEED_LOCK_NAME = "proserfy-seed"
+# Postgres advisory locks are keyed by a number
+SEED_LOCK_KEY = zlib.crc32(SEED_LOCK_NAME.encode())
+# (acquire, release) on the servers that can lock across hosts
+SEED_SERVER_LOCKS = {
+    "mysql": (
+        text("SELECT GET_LOCK(:name, -1)").bindparams(name=SEED_LOCK_NAME),
+        text("SELECT RELEASE_LOCK(:name)").bindparams(name=SEED_LOCK_NAME),
+    ),
+    "postgresql": (
+        text("SELECT pg_advisory_lock(:key)").bindparams(key=SEED_LOCK_KEY),
+        text("SELECT pg_advisory_unlock(:key)").bindparams(key=SEED_LOCK_KEY),
+    ),
+}
+SEED_LOCK_FILE = os.getenv("SEED_LOCK_FILE") or os.path.join(
+    tempfile.gettempdir(), "proserfy-seed.lock"
+)
+
+DEFAULT_ROLES = ["common", "professional"]
+
+DEFAULT_SUBSCRIPTION_TYPES = [
+    {"name": "Yearly", "price": 9.99},
+    {"name": "Quarterly", "price": 12.99},
+    {"name": "Monthly", "price": 14.99},
+]
+
+
+@contextmanager
+def seed_lock(connection):
+    # Workers started together, on any number of hosts, seed one at a time;
+    # the others find everything in place and only pay for the checks. The
+    # lock is held by the connection's session, not its transaction, so it
+    # is released only after the seed has been committed, and the server
+    # drops it if the worker dies.
+    server_lock = SEED_SERVER_LOCKS.get(connection.dialect.name)
+    if server_lock is not None:
+        acquire, release = server_lock
+        connection.execute(acquire)
+        connection.commit()
+        try:
+            yield
+        finally:
+            connection.execute(release)
+            connection.commit()
+        return
+
+    # SQLite lives on one host, so a file lock is enough
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+
+    with open(SEED_LOCK_FILE, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def ensure_schema(connection):
+    # One catalog query when the schema is already complete
+    import models.categories  # noqa: F401 registers the seed-only tables
+    import models.schema_migrations  # noqa: F401
+    import models.versions  # noqa: F401
+
+    existing_tables = set(inspect(connection).get_table_names())
+    if not set(Base.metadata.tables).issubset(existing_tables):
+        Base.metadata.create_all(bind=connection)
+
+
+def seed_defaults(connection):
     from models.categories import Category
     from models.subcategories import SubCategory
     from models.roles import Role
     from models.versions import Version
     from models.subscriptions import SubscriptionType
 
-    Base.metadata.create_all(bind=engine)
+    # Each table is read once and only the missing rows are inserted
+    existing_roles = set(connection.scalars(select(Role.name)))
+    missing_roles = [name for name in DEFAULT_ROLES if name not in existing_roles]
+    if missing_roles:
+        connection.execute(insert(Role), [{"name": name} for name in missing_roles])
 
-    db = SessionLocal()
-    try:
-        if db.query(Role).count() == 0:
-            common_role = Role(name="common")
-            professional_role = Role(name="professional")
-            db.add(common_role)
-            db.add(professional_role)
-            db.commit()
-
-        if db.query(Version).count() == 0:
-            first_version = Version(version="1.0.0", release_date=date.today())
-            db.add(first_version)
-            db.commit()
-
-        if db.query(SubscriptionType).count() == 0:
-            yearly = SubscriptionType(name="Yearly", price=9.99)
-            quarterly = SubscriptionType(name="Quarterly", price=12.99)
-            monthly = SubscriptionType(name="Monthly", price=14.99)
-
-            db.add_all([yearly, quarterly, monthly])
-            db.commit()
-        for category_data in DEFAULT_CATEGORIES:
-            category_name = category_data["name"]
-            subcategories = category_data["subcategories"]
-
-            category = db.query(Category).filter(Category.name == category_name).first()
-            if not category:
-                category = Category(name=category_name)
-                db.add(category)
-                db.commit()
-                db.refresh(category)
-
-            for subcategory_data in subcategories:
-                subcategory_name = subcategory_data["name"]
-                subcategory = (
-                    db.query(SubCategory)
-                    .filter(
-                        SubCategory.name == subcategory_name,
-                        SubCategory.category_id == category.id,
-                    )
-                    .first()
-                )
-                if not subcategory:
-                    subcategory = SubCategory(
-                        name=subcategory_name, category_id=category.id
+    if connection.scalar(select(Version.id).limit(1)) is None:
+        connection.execute(
+            insert(Version), [{"version": "1.0.0", "release_date": date.today()}]
+        )
+
+    existing_types = set(connection.scalars(select(SubscriptionType.name)))
+    missing_types = [
+        subscription_type
+        for subscription_type in DEFAULT_SUBSCRIPTION_TYPES
+        if subscription_type["name"] not in existing_types
+    ]
+    if missing_types:
+        connection.execute(insert(SubscriptionType), missing_types)
+
+    existing_categories = set(connection.scalars(select(Category.name)))
+    missing_categories = [
+        {"name": category_data["name"]}
+        for category_data in DEFAULT_CATEGORIES
+        if category_data["name"] not in existing_categories
+    ]
+    if missing_categories:
+        connection.execute(insert(Category), missing_categories)
+
+    category_ids = dict(connection.execute(select(Category.name, Category.id)).all())
+    existing_subcategories = set(
+        connection.execute(select(SubCategory.category_id, SubCategory.name)).all()
+    )
+    missing_subcategories = [
+        {"name": subcategory_data["name"], "category_id": category_id}
+        for category_data in DEFAULT_CATEGORIES
+        for category_id in [category_ids[category_data["name"]]]
+        for subcategory_data in category_data["subcategories"]
+        if (category_id, subcategory_data["name"]) not in existing_subcategories
+    ]
+    if missing_subcategories:
+        connection.execute(insert(SubCategory), missing_subcategories)
+
+
+def init_db():
+    from migrations import missing_columns, run_migrations
+
+    with engine.connect() as connection:
+        with seed_lock(connection):
+            with connection.begin():
+                ensure_schema(connection)
+                run_migrations(connection)
+                missing = missing_columns(connection)
+                if missing:
+                    raise RuntimeError(
+                        "The database has no column for "
+                        f"{', '.join(missing)}; add a migration for it"
                     )
-                    db.add(subcategory)
-            db.commit()
-    finally:
-        db.close()
+                seed_defaults(connection)
@@ -11,3 +11,7 @@ GOOGLE_REDIRECT_URL = os.environ.get("GOOGLE_REDIRECT_URL", None)
 GOOGLE_RESPONSE_TYPE = os.environ.get("GOOGLE_RESPONSE_TYPE", None)
 GOOGLE_SCOPE = os.environ.get("GOOGLE_SCOPE", None)
 GOOGLE_TOKEN_URL = os.environ.get("GOOGLE_TOKEN_URL", None)
+GOOGLE_CERTS_URL = os.environ.get(
+    "GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs"
+)
+GOOGLE_HTTP_TIMEOUT_SECONDS = float(os.environ.get("GOOGLE_HTTP_TIMEOUT_SECONDS", 5))
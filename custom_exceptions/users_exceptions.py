@@ -1,4 +1,5 @@
 class GenericException(Exception):
-    def __init__(self, message: str, code: int):
+    def __init__(self, message: str, code: int, headers: dict = None):
         self.message = message
         self.code = code
+        self.headers = headers
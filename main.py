@@ -1,17 +1,48 @@
+import time
+
+# Measured from here so the report includes import time
+startup_started = time.perf_counter()
+
+import asyncio
+import logging
 from fastapi.staticfiles import StaticFiles
 import config.database
+from config.database import (
+    PRIMARY_PIN_COOKIE,
+    PRIMARY_PIN_SECONDS,
+    REPLICA_URL_DATABASES,
+)
 import config.files
 from utils.error_handler import (
     generic_error_exception_handler,
     validation_exception_handler,
 )
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from custom_exceptions.users_exceptions import GenericException
 import models.users as models
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from routes import user, professional_service, comment, rating, version, subscription
+from routes import (
+    comment,
+    internal,
+    professional_service,
+    rating,
+    subscription,
+    user,
+    version,
+)
+from utils.geo_index_handler import (
+    GEO_INDEX_ENABLED,
+    rebuild_geo_index,
+    refresh_geo_index_periodically,
+)
+from utils.google_handlers import close_http_client
+from utils.revocation_handler import (
+    load_revoked_tokens,
+    refresh_revoked_tokens_periodically,
+)
+from utils.write_behind_handler import WRITE_BEHIND_ENABLED, write_behind
 import uvicorn
 import os
 import config
@@ -27,6 +58,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    # Replicas lag behind the primary; a client that just wrote reads from the
+    # primary for a few seconds so it sees its own changes.
+    response = await call_next(request)
+    if (
+        REPLICA_URL_DATABASES
+        and request.method not in READ_ONLY_METHODS
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            key=PRIMARY_PIN_COOKIE,
+            value="1",
+            max_age=PRIMARY_PIN_SECONDS,
+            httponly=True,
+        )
+    return response
+
+
 app.add_exception_handler(GenericException, generic_error_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 
@@ -42,9 +95,54 @@ app.mount(
 )
 
 
+# uvicorn configures this logger, so INFO lines show up in the host logs
+logger = logging.getLogger("uvicorn.error")
+
+seed_started = time.perf_counter()
 config.database.init_db()
+logger.info(
+    f"Schema check and seeding took {(time.perf_counter() - seed_started) * 1000:.0f} ms"
+)
+
+
+@app.on_event("startup")
+async def load_geo_index():
+    if GEO_INDEX_ENABLED:
+        rebuild_geo_index()
+        app.state.geo_index_task = asyncio.create_task(refresh_geo_index_periodically())
+
+
+@app.on_event("startup")
+async def load_token_revocations():
+    load_revoked_tokens()
+    app.state.revocation_task = asyncio.create_task(
+        refresh_revoked_tokens_periodically()
+    )
+
+
+@app.on_event("startup")
+async def start_write_behind():
+    if WRITE_BEHIND_ENABLED:
+        write_behind.start()
+
+
+@app.on_event("startup")
+async def report_startup_time():
+    # Registered last, so it runs after the other startup hooks
+    logger.info(
+        f"Startup completed in {(time.perf_counter() - startup_started) * 1000:.0f} ms"
+    )
+
+
+@app.on_event("shutdown")
+async def flush_write_behind():
+    await write_behind.stop()
+
+
+@app.on_event("shutdown")
+async def close_google_client():
+    await close_http_client()
 
-models.Base.metadata.create_all(bind=config.database.engine)
 
 app.include_router(user.router, prefix="/v1")
 app.include_router(subscription.router, prefix="/v1")
@@ -52,6 +150,7 @@ app.include_router(professional_service.router, prefix="/v1")
 app.include_router(comment.router, prefix="/v1")
 app.include_router(rating.router, prefix="/v1")
 app.include_router(version.router, prefix="/v1")
+app.include_router(internal.router, prefix="/v1")
 
 
 if __name__ == "__main__":
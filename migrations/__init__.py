@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import List
+from fastapi.logger import logger
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.engine import Connection
+from migrations import (
+    m0001_rating_aggregates,
+    m0002_derived_tables,
+    m0003_revoked_tokens_jti,
+    m0004_hot_path_indexes,
+    m0005_revoked_tokens_revoked_at,
+    m0006_service_keyset_indexes,
+    m0007_work_schedules_service_id,
+    m0008_average_rating_double,
+)
+
+# create_all only creates missing tables. Any change to a table that may
+# already exist in a live database ships here as a numbered module with a
+# VERSION and an upgrade(connection); init_db applies the pending ones in
+# order and records them in schema_migrations.
+MIGRATIONS = [
+    m0001_rating_aggregates,
+    m0002_derived_tables,
+    m0003_revoked_tokens_jti,
+    m0004_hot_path_indexes,
+    m0005_revoked_tokens_revoked_at,
+    m0006_service_keyset_indexes,
+    m0007_work_schedules_service_id,
+    m0008_average_rating_double,
+]
+
+
+def run_migrations(connection: Connection):
+    from models.schema_migrations import SchemaMigration
+
+    applied = set(connection.scalars(select(SchemaMigration.version)))
+    for migration in MIGRATIONS:
+        if migration.VERSION in applied:
+            continue
+        logger.info(f"Applying migration {migration.VERSION}")
+        migration.upgrade(connection)
+        connection.execute(
+            insert(SchemaMigration).values(
+                version=migration.VERSION, applied_at=datetime.utcnow()
+            )
+        )
+
+
+def missing_columns(connection: Connection) -> List[str]:
+    # Mapped columns the database does not have, i.e. a model that changed
+    # without a migration to bring existing databases along. Checked after
+    # every upgrade so the app stops at startup rather than on the first
+    # query that reads the column.
+    from config.database import Base
+
+    existing = {
+        table_name: {column["name"] for column in columns}
+        for (_, table_name), columns in inspect(connection).get_multi_columns().items()
+    }
+    return [
+        f"{table.name}.{column.name}"
+        for table in Base.metadata.sorted_tables
+        for column in table.columns
+        if column.name not in existing.get(table.name, ())
+    ]
@@ -0,0 +1,240 @@
+"""Fails when a hot-path query is planned as a full table scan.
+
+Runs the app's own query helpers (the service listings, the comment feed,
+the leaderboard, the principal lookup) inside a transaction that is rolled
+back, captures every SELECT they send, and EXPLAINs each one against
+URL_DATABASE. Exits non-zero if any of them reads a whole table instead of
+using an index, or if a keyset listing sorts its rows instead of walking an
+index in order. Run it after applying migrations, e.g. in CI against a
+freshly migrated database:
+
+    python -m migrations.check_query_plans
+
+Postgres picks sequential scans for small tables no matter what indexes
+exist, so the check disables them for its session; MySQL may do the same
+on an almost empty database, so give it some rows first. The listings
+only send their eager-load queries when a page has rows, so a database
+with a few services in it also checks those.
+"""
+
+import re
+import sys
+from typing import Callable, List, Tuple
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from config.database import engine
+import main  # noqa: F401 registers every mapper and applies migrations
+from models.ratings import Rating
+from routes.comment import service_comments_page
+from routes.professional_services.common import (
+    leaderboard_services,
+    list_services,
+    list_services_in_range,
+)
+from utils.filters_handler import ServiceFilters
+from utils.pagination_handler import encode_cursor
+from utils.principal_cache_handler import load_principal
+
+PAGE_SIZE = 15
+# Somewhere in the middle of the listing, so the keyset condition is planned
+SERVICES_CURSOR = encode_cursor([3.5, 1000])
+# Searches page on (relevance, average_rating, id)
+SEARCH_CURSOR = encode_cursor([1.0, 3.5, 1000])
+
+
+def service_filters(**values) -> ServiceFilters:
+    defaults = dict(
+        q=None,
+        category_id=None,
+        subcategory_id=None,
+        min_rating=None,
+        min_price=None,
+        max_price=None,
+        open_at=None,
+        open_now=False,
+    )
+    return ServiceFilters(**{**defaults, **values})
+
+
+def listing_request() -> Request:
+    # The listings only read the URL to build the page links
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "scheme": "http",
+            "server": ("localhost", 80),
+            "root_path": "",
+            "path": "/v1/professional-services",
+            "query_string": b"",
+            "headers": [],
+        }
+    )
+
+
+def listing(filters: ServiceFilters, cursor: str = SERVICES_CURSOR):
+    return lambda db: list_services(
+        db, listing_request(), PAGE_SIZE, 0, cursor, False, False, filters
+    )
+
+
+def listing_in_range(filters: ServiceFilters):
+    return lambda db: list_services_in_range(
+        db,
+        listing_request(),
+        PAGE_SIZE,
+        0,
+        SERVICES_CURSOR,
+        -33.45,
+        -70.65,
+        10,
+        "rating",
+        False,
+        False,
+        filters,
+    )
+
+
+def rating_by_user(db: Session):
+    # Same lookup as the duplicate check in create_rating
+    return (
+        db.query(Rating)
+        .filter(Rating.user_id == 1, Rating.professional_service_id == 1)
+        .first()
+    )
+
+
+# (name, helper run against a Session, whether its rows must come out of an
+# index in order rather than through a sort)
+HOT_PATHS: List[Tuple[str, Callable[[Session], object], bool]] = [
+    ("service listing, first page", listing(service_filters(), cursor=None), True),
+    ("service listing, next page", listing(service_filters()), True),
+    (
+        "service listing by subcategory",
+        listing(service_filters(subcategory_id=1)),
+        True,
+    ),
+    (
+        "service listing by price range",
+        listing(service_filters(min_price=1000, max_price=5000)),
+        True,
+    ),
+    ("service listing by minimum rating", listing(service_filters(min_rating=4)), True),
+    # Relevance is computed per match, so these sort the matching rows
+    (
+        "service search",
+        listing(service_filters(q="clases de guitarra"), cursor=SEARCH_CURSOR),
+        False,
+    ),
+    ("services in range", listing_in_range(service_filters()), False),
+    (
+        "comment feed page",
+        lambda db: service_comments_page(
+            db, listing_request(), 1, 20, encode_cursor([1000])
+        ),
+        True,
+    ),
+    (
+        "leaderboard",
+        lambda db: leaderboard_services(db, "Santiago", 1, 10),
+        True,
+    ),
+    ("principal by email", lambda db: load_principal(db, "user@example.com"), False),
+    ("rating by a user for a service", rating_by_user, False),
+]
+
+
+def captured_selects(connection: Connection, run) -> List[Tuple[str, object]]:
+    # Every SELECT the helper sends, with the parameters it sent them with
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        run(Session(bind=connection))
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+    return statements
+
+
+def explain(connection: Connection, statement: str, parameters) -> List[str]:
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        result = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        )
+        return [row[3] for row in result]
+    if dialect == "mysql":
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        return [
+            f"{row['table']}: type={row['type']} key={row['key']} "
+            f"extra={row['Extra']}"
+            for row in rows.mappings()
+        ]
+    result = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+    return [row[0] for row in result]
+
+
+def full_scans(dialect: str, plan: List[str]) -> List[str]:
+    if dialect == "sqlite":
+        # "SCAN t USING [COVERING] INDEX ..." walks an index, plain "SCAN t" does not
+        return [
+            line for line in plan if line.startswith("SCAN") and "USING" not in line
+        ]
+    if dialect == "mysql":
+        return [line for line in plan if "type=ALL " in line]
+    return [line for line in plan if "Seq Scan" in line]
+
+
+def sorts(dialect: str, plan: List[str]) -> List[str]:
+    if dialect == "sqlite":
+        return [line for line in plan if "TEMP B-TREE FOR ORDER BY" in line]
+    if dialect == "mysql":
+        return [line for line in plan if "Using filesort" in line]
+    return [line for line in plan if re.search(r"(^|->\s*)(Incremental )?Sort\b", line)]
+
+
+def check_query_plans(connection: Connection) -> List[str]:
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text("SET enable_seqscan = off"))
+
+    failures = []
+    for name, run, ordered_by_index in HOT_PATHS:
+        statements = captured_selects(connection, run)
+
+        problems = []
+        for statement, parameters in statements:
+            plan = explain(connection, statement, parameters)
+            bad = full_scans(dialect, plan)
+            if ordered_by_index:
+                bad += sorts(dialect, plan)
+            if bad:
+                problems.append((statement, plan))
+
+        if problems:
+            failures.append(name)
+            print(f"FAIL  {name}")
+            for statement, plan in problems:
+                print(f"    {' '.join(statement.split())[:200]}")
+                for line in plan:
+                    print(f"        {line}")
+        else:
+            print(f"ok    {name} ({len(statements)} statements)")
+    return failures
+
+
+if __name__ == "__main__":
+    with engine.connect() as connection:
+        with connection.begin() as transaction:
+            failures = check_query_plans(connection)
+            # The helpers only read, but nothing they touch is kept
+            transaction.rollback()
+    if failures:
+        print(f"{len(failures)} hot queries fall back to a full table scan or sort")
+        sys.exit(1)
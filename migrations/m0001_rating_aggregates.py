@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Float, Integer
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from migrations.operations import add_column
+
+VERSION = "0001_rating_aggregates"
+
+
+def upgrade(connection: Connection):
+    add_column(
+        connection,
+        "professional_services",
+        Column("rating_sum", Float, nullable=False, server_default="0"),
+    )
+    add_column(
+        connection,
+        "professional_services",
+        Column("rating_count", Integer, nullable=False, server_default="0"),
+    )
+
+    from utils.ratings_handler import reconcile_rating_aggregates
+
+    # The session joins the migration's transaction; its commits do not end it
+    reconcile_rating_aggregates(Session(bind=connection))
@@ -0,0 +1,19 @@
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+VERSION = "0002_derived_tables"
+
+
+def upgrade(connection: Connection):
+    # create_all has already added the empty side tables; fill them from the
+    # rows that existed before they did
+    from utils.availability_handler import rebuild_availability_index
+    from utils.leaderboard_handler import rebuild_leaderboards
+    from utils.ratings_handler import rebuild_rating_histograms
+    from utils.search_handler import rebuild_search_index
+
+    db = Session(bind=connection)
+    rebuild_search_index(db)
+    rebuild_availability_index(db)
+    rebuild_rating_histograms(db)
+    rebuild_leaderboards(db)
@@ -0,0 +1,17 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from migrations.operations import has_column, has_table
+
+VERSION = "0003_revoked_tokens_jti"
+
+
+def upgrade(connection: Connection):
+    # The old token-string table was never written to, so it is replaced
+    # rather than altered
+    if has_table(connection, "revoked_tokens") and not has_column(
+        connection, "revoked_tokens", "jti"
+    ):
+        from models.revoked_tokens import RevokedToken
+
+        connection.execute(text("DROP TABLE revoked_tokens"))
+        RevokedToken.__table__.create(connection)
@@ -0,0 +1,103 @@
+from fastapi.logger import logger
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from migrations.operations import add_index, has_index
+
+VERSION = "0004_hot_path_indexes"
+
+# (table, index name, columns, unique); names match the models so fresh
+# databases built by create_all end up with the same schema
+INDEXES = [
+    (
+        "professional_services",
+        "ix_professional_services_latitude_longitude",
+        ["latitude", "longitude"],
+        False,
+    ),
+    # Also serves plain subcategory_id filters
+    (
+        "professional_services",
+        "ix_professional_services_subcategory_id_average_rating",
+        ["subcategory_id", "average_rating"],
+        False,
+    ),
+    (
+        "professional_services",
+        "ix_professional_services_range_from_range_to",
+        ["range_from", "range_to"],
+        False,
+    ),
+    ("service_images", "ix_service_images_service_id", ["service_id"], False),
+    (
+        "ratings",
+        "ix_ratings_professional_service_id",
+        ["professional_service_id"],
+        False,
+    ),
+    (
+        "ratings",
+        "ix_ratings_user_id_professional_service_id",
+        ["user_id", "professional_service_id"],
+        True,
+    ),
+    (
+        "comments",
+        "ix_comments_professional_service_id_id",
+        ["professional_service_id", "id"],
+        False,
+    ),
+    (
+        "subscriptions",
+        "ix_subscriptions_user_id_end_date",
+        ["user_id", "end_date"],
+        False,
+    ),
+    ("profile_images", "ix_profile_images_user_id", ["user_id"], False),
+]
+
+
+def remove_duplicate_ratings(connection: Connection) -> int:
+    # The unique index cannot be built while a user has rated a service
+    # twice; the earliest rating is kept. MySQL cannot delete from a table it
+    # selects from in the same statement, hence the derived table.
+    return connection.execute(
+        text(
+            "DELETE FROM ratings WHERE id NOT IN ("
+            "SELECT keep_id FROM ("
+            "SELECT MIN(id) AS keep_id FROM ratings "
+            "GROUP BY user_id, professional_service_id"
+            ") AS earliest)"
+        )
+    ).rowcount
+
+
+def upgrade(connection: Connection):
+    removed = remove_duplicate_ratings(connection)
+    if removed:
+        from sqlalchemy.orm import Session
+        from utils.leaderboard_handler import rebuild_leaderboards
+        from utils.ratings_handler import (
+            rebuild_rating_histograms,
+            reconcile_rating_aggregates,
+        )
+
+        logger.warning(f"Removed {removed} duplicate ratings before indexing")
+        db = Session(bind=connection)
+        reconcile_rating_aggregates(db)
+        rebuild_rating_histograms(db)
+        rebuild_leaderboards(db)
+
+    for table_name, index_name, columns, unique in INDEXES:
+        add_index(connection, table_name, index_name, columns, unique)
+
+    if connection.dialect.name == "mysql" and not has_index(
+        connection, "professional_services", "ix_professional_services_fulltext"
+    ):
+        from models.professional_services import ProfessionalService
+
+        fulltext = next(
+            index
+            for index in ProfessionalService.__table__.indexes
+            if index.name == "ix_professional_services_fulltext"
+        )
+        fulltext.create(connection)
@@ -0,0 +1,11 @@
+from sqlalchemy.engine import Connection
+from migrations.operations import add_index
+
+VERSION = "0005_revoked_tokens_revoked_at"
+
+
+def upgrade(connection: Connection):
+    # Revocation refreshes select the rows revoked since the previous one
+    add_index(
+        connection, "revoked_tokens", "ix_revoked_tokens_revoked_at", ["revoked_at"]
+    )
@@ -0,0 +1,27 @@
+from sqlalchemy.engine import Connection
+from migrations.operations import add_index, drop_index
+
+VERSION = "0006_service_keyset_indexes"
+
+
+def upgrade(connection: Connection):
+    # Keyset pages are ordered by (average_rating DESC, id DESC); with id in
+    # the index the planner walks it backwards instead of sorting the table
+    add_index(
+        connection,
+        "professional_services",
+        "ix_professional_services_average_rating_id",
+        ["average_rating", "id"],
+    )
+    add_index(
+        connection,
+        "professional_services",
+        "ix_professional_services_subcategory_id_average_rating_id",
+        ["subcategory_id", "average_rating", "id"],
+    )
+    # Superseded by the index above, which starts with the same columns
+    drop_index(
+        connection,
+        "professional_services",
+        "ix_professional_services_subcategory_id_average_rating",
+    )
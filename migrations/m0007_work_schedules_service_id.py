@@ -0,0 +1,14 @@
+from sqlalchemy.engine import Connection
+from migrations.operations import add_index
+
+VERSION = "0007_work_schedules_service_id"
+
+
+def upgrade(connection: Connection):
+    # Service listings eager-load the schedules of every service on the page
+    add_index(
+        connection,
+        "work_schedules",
+        "ix_work_schedules_professional_service_id",
+        ["professional_service_id"],
+    )
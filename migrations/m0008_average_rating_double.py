@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Double
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from migrations.operations import alter_column_type
+
+VERSION = "0008_average_rating_double"
+
+
+def upgrade(connection: Connection):
+    # Keyset cursors carry average_rating as a double and compare it exactly;
+    # MySQL's single-precision FLOAT never equals it, so pages skipped or
+    # repeated rows at rating ties
+    changed = alter_column_type(
+        connection,
+        "professional_services",
+        Column("average_rating", Double),
+    )
+    changed |= alter_column_type(
+        connection,
+        "leaderboard_entries",
+        Column("average_rating", Double, nullable=False),
+    )
+    if not changed:
+        return
+
+    from utils.leaderboard_handler import rebuild_leaderboards
+    from utils.ratings_handler import reconcile_rating_aggregates
+
+    # The stored values are still the rounded single-precision ones
+    db = Session(bind=connection)
+    reconcile_rating_aggregates(db)
+    rebuild_leaderboards(db)
@@ -0,0 +1,143 @@
+from typing import List
+from fastapi.logger import logger
+from sqlalchemy import Column, Index, MetaData, Table, inspect, text
+from sqlalchemy.engine import Connection
+
+# Idempotent building blocks: every operation checks the live schema first,
+# so a migration that stopped half way (MySQL commits each DDL statement on
+# its own) can simply run again.
+
+
+def has_table(connection: Connection, table_name: str) -> bool:
+    return inspect(connection).has_table(table_name)
+
+
+def has_column(connection: Connection, table_name: str, column_name: str) -> bool:
+    return any(
+        column["name"] == column_name
+        for column in inspect(connection).get_columns(table_name)
+    )
+
+
+def has_index(connection: Connection, table_name: str, index_name: str) -> bool:
+    return any(
+        index["name"] == index_name
+        for index in inspect(connection).get_indexes(table_name)
+    )
+
+
+def add_column(connection: Connection, table_name: str, column: Column):
+    if has_column(connection, table_name, column.name):
+        return
+    Table(table_name, MetaData()).append_column(column)
+    dialect = connection.dialect
+    specification = dialect.ddl_compiler(dialect, None).get_column_specification(column)
+    quote = dialect.identifier_preparer.quote
+    connection.execute(
+        text(f"ALTER TABLE {quote(table_name)} ADD COLUMN {specification}")
+    )
+    logger.info(f"Added column {table_name}.{column.name}")
+
+
+def alter_column_type(connection: Connection, table_name: str, column: Column) -> bool:
+    # Returns whether the column was changed. SQLite stores every floating
+    # point column as an 8-byte REAL and ignores declared types, so there is
+    # nothing to change there.
+    dialect = connection.dialect
+    if dialect.name == "sqlite":
+        return False
+    type_compiler = dialect.type_compiler_instance
+    target = type_compiler.process(column.type)
+    existing = next(
+        existing["type"]
+        for existing in inspect(connection).get_columns(table_name)
+        if existing["name"] == column.name
+    )
+    if type_compiler.process(existing) == target:
+        return False
+
+    quote = dialect.identifier_preparer.quote
+    if dialect.name == "mysql":
+        # MODIFY restates the whole column, nullability and default included
+        Table(table_name, MetaData()).append_column(column)
+        specification = dialect.ddl_compiler(dialect, None).get_column_specification(
+            column
+        )
+        statement = f"ALTER TABLE {quote(table_name)} MODIFY COLUMN {specification}"
+    else:
+        statement = (
+            f"ALTER TABLE {quote(table_name)} "
+            f"ALTER COLUMN {quote(column.name)} TYPE {target}"
+        )
+    connection.execute(text(statement))
+    logger.info(f"Changed {table_name}.{column.name} to {target}")
+    return True
+
+
+def _existing_indexes(connection: Connection, table_name: str) -> List[dict]:
+    inspector = inspect(connection)
+    indexes = [
+        {
+            "name": index["name"],
+            "columns": index["column_names"],
+            "unique": index["unique"],
+        }
+        for index in inspector.get_indexes(table_name)
+    ]
+    indexes += [
+        {
+            "name": constraint["name"],
+            "columns": constraint["column_names"],
+            "unique": True,
+        }
+        for constraint in inspector.get_unique_constraints(table_name)
+    ]
+    primary_key = inspector.get_pk_constraint(table_name)
+    if primary_key["constrained_columns"]:
+        indexes.append(
+            {
+                "name": primary_key["name"],
+                "columns": primary_key["constrained_columns"],
+                "unique": True,
+            }
+        )
+    return indexes
+
+
+def add_index(
+    connection: Connection,
+    table_name: str,
+    index_name: str,
+    columns: List[str],
+    unique: bool = False,
+):
+    # An existing index that starts with the same columns already serves the
+    # lookups (MySQL creates one for every foreign key), so it is not
+    # duplicated. Unique indexes must match exactly.
+    for index in _existing_indexes(connection, table_name):
+        if index["name"] == index_name:
+            return
+        if unique and index["unique"] and index["columns"] == columns:
+            return
+        if not unique and index["columns"][: len(columns)] == columns:
+            return
+
+    _index(table_name, index_name, columns, unique).create(connection)
+    logger.info(f"Created index {index_name} on {table_name}({', '.join(columns)})")
+
+
+def drop_index(connection: Connection, table_name: str, index_name: str):
+    for index in inspect(connection).get_indexes(table_name):
+        if index["name"] == index_name:
+            _index(table_name, index_name, index["column_names"]).drop(connection)
+            logger.info(f"Dropped index {index_name} on {table_name}")
+            return
+
+
+def _index(
+    table_name: str, index_name: str, columns: List[str], unique: bool = False
+) -> Index:
+    table = Table(
+        table_name, MetaData(), *(Column(column_name) for column_name in columns)
+    )
+    return Index(index_name, *(table.c[name] for name in columns), unique=unique)
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float
+from sqlalchemy import Column, Index, Integer, String, ForeignKey, Float
 from sqlalchemy.orm import relationship
 from config.database import Base
 
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index(
+            "ix_comments_professional_service_id_id", "professional_service_id", "id"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     text = Column(String(255), nullable=False)
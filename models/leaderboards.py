@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Double, ForeignKey, Index, Integer, String
+from config.database import Base
+
+
+class LeaderboardEntry(Base):
+    __tablename__ = "leaderboard_entries"
+    __table_args__ = (
+        Index(
+            "ix_leaderboard_entries_ranking",
+            "city_key",
+            "subcategory_id",
+            "average_rating",
+            "rating_count",
+            "professional_service_id",
+        ),
+    )
+
+    professional_service_id = Column(
+        Integer, ForeignKey("professional_services.id"), primary_key=True
+    )
+    city_key = Column(String(100), nullable=False)
+    subcategory_id = Column(Integer, ForeignKey("subcategories.id"), nullable=False)
+    average_rating = Column(Double, nullable=False, default=0.0)
+    rating_count = Column(Integer, nullable=False, default=0)
@@ -1,5 +1,5 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Float, Time
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, Double, Index, Integer, String, ForeignKey, Float, Time
+from sqlalchemy.orm import query_expression, relationship
 from config.database import Base
 
 class WorkSchedule(Base):
@@ -10,14 +10,48 @@ class WorkSchedule(Base):
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
     is_active = Column(Boolean, default=True)
-    professional_service_id = Column(Integer, ForeignKey("professional_services.id"), nullable=False)
+    professional_service_id = Column(Integer, ForeignKey("professional_services.id"), nullable=False, index=True)
 
     professional_service = relationship("ProfessionalService", back_populates="work_schedules")
 
 
+class ServiceAvailability(Base):
+    # Active work schedules flattened into minute-of-week intervals
+    # [start_minute, end_minute), Monday 00:00 being minute 0.
+    __tablename__ = "service_availability"
+    __table_args__ = (
+        Index("ix_service_availability_start_minute_end_minute", "start_minute", "end_minute"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    professional_service_id = Column(Integer, ForeignKey("professional_services.id"), nullable=False, index=True)
+    start_minute = Column(Integer, nullable=False)
+    end_minute = Column(Integer, nullable=False)
+
+
 
 class ProfessionalService(Base):
     __tablename__ = "professional_services"
+    __table_args__ = (
+        Index("ix_professional_services_latitude_longitude", "latitude", "longitude"),
+        # Keyset listings are ordered by (average_rating, id), with or without
+        # a subcategory filter
+        Index("ix_professional_services_average_rating_id", "average_rating", "id"),
+        Index(
+            "ix_professional_services_subcategory_id_average_rating_id",
+            "subcategory_id",
+            "average_rating",
+            "id",
+        ),
+        Index("ix_professional_services_range_from_range_to", "range_from", "range_to"),
+        Index(
+            "ix_professional_services_fulltext",
+            "name",
+            "description",
+            "city",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -27,7 +61,10 @@ class ProfessionalService(Base):
     range_to = Column(Integer, nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
-    average_rating = Column(Float, default=0.0)
+    # Double, not FLOAT: keyset cursors compare it exactly
+    average_rating = Column(Double, default=0.0)
+    rating_sum = Column(Float, nullable=False, default=0.0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
     professional_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     subcategory_id = Column(Integer, ForeignKey("subcategories.id"), nullable=False)
 
@@ -37,3 +74,9 @@ class ProfessionalService(Base):
     comments = relationship("Comment", back_populates="professional_service")
     ratings = relationship("Rating", back_populates="professional_service")
     images = relationship("ServiceImage", back_populates="professional_service")
+    rating_histogram = relationship(
+        "RatingHistogram", back_populates="professional_service", uselist=False
+    )
+
+    # Relevance of the current text search, only loaded when one is running
+    search_score = query_expression()
@@ -8,6 +8,6 @@ class ProfileImage(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String(255), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
     user = relationship("User", back_populates="profile_image")
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy.orm import relationship
+from config.database import Base
+
+
+class RatingHistogram(Base):
+    __tablename__ = "rating_histograms"
+
+    professional_service_id = Column(
+        Integer, ForeignKey("professional_services.id"), primary_key=True
+    )
+    stars_1 = Column(Integer, nullable=False, default=0)
+    stars_2 = Column(Integer, nullable=False, default=0)
+    stars_3 = Column(Integer, nullable=False, default=0)
+    stars_4 = Column(Integer, nullable=False, default=0)
+    stars_5 = Column(Integer, nullable=False, default=0)
+
+    professional_service = relationship(
+        "ProfessionalService", back_populates="rating_histogram"
+    )
@@ -1,10 +1,20 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float
+from sqlalchemy import Column, Integer, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from config.database import Base
 
 
 class Rating(Base):
     __tablename__ = "ratings"
+    __table_args__ = (
+        Index("ix_ratings_professional_service_id", "professional_service_id"),
+        # One rating per user and service
+        Index(
+            "ix_ratings_user_id_professional_service_id",
+            "user_id",
+            "professional_service_id",
+            unique=True,
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     rating = Column(Float, nullable=False)
@@ -1,10 +1,12 @@
 from sqlalchemy import Column, Integer, String, DateTime
 from config.database import Base
-from datetime import datetime, timezone
+from datetime import datetime
 
 
 class RevokedToken(Base):
     __tablename__ = "revoked_tokens"
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String(1024), index=True, unique=True)
-    revoked_at = Column(DateTime, default=datetime.now(timezone.utc))
+    jti = Column(String(36), index=True, unique=True, nullable=False)
+    # Naive UTC, same clock as the token "exp" claim
+    expires_at = Column(DateTime, index=True, nullable=False)
+    revoked_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, DateTime, String
+from config.database import Base
+from datetime import datetime
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+    version = Column(String(64), primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
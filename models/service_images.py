@@ -8,6 +8,8 @@ class ServiceImage(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String(255), nullable=False)
-    service_id = Column(Integer, ForeignKey("professional_services.id"), nullable=False)
+    service_id = Column(
+        Integer, ForeignKey("professional_services.id"), nullable=False, index=True
+    )
 
     professional_service = relationship("ProfessionalService", back_populates="images")
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+from config.database import Base
+
+
+class ServiceSearchToken(Base):
+    __tablename__ = "service_search_tokens"
+    __table_args__ = (
+        Index("ix_service_search_tokens_token_service_id", "token", "service_id"),
+    )
+
+    service_id = Column(
+        Integer, ForeignKey("professional_services.id"), primary_key=True
+    )
+    token = Column(String(50), primary_key=True)
+    weight = Column(Integer, nullable=False, default=1)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from config.database import Base
@@ -14,6 +14,9 @@ class SubscriptionType(Base):
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        Index("ix_subscriptions_user_id_end_date", "user_id", "end_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     start_date = Column(DateTime, default=datetime.now(timezone.utc))
@@ -7,6 +7,7 @@ from models.comments import Comment
 from models.subscriptions import Subscription
 from models.ratings import Rating
 from models.profile_images import ProfileImage 
+from models.rating_histograms import RatingHistogram
 
 
 class User(Base):
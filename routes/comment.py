@@ -1,33 +1,136 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional, Union
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import JSONResponse
 from custom_exceptions.users_exceptions import GenericException
 from models.professional_services import ProfessionalService
 from models.comments import Comment
+from models.profile_images import ProfileImage
 from models.users import User
-from routes.professional_services.protected import get_current_active_user
-from schemas.profesional_service_schema import CommentCreate, CommentResponse
-from config.database import db_dependency
+from utils.identity_handler import get_current_active_user
+from schemas.profesional_service_schema import (
+    CommentCreate,
+    CommentFeedItem,
+    CommentFeedResponse,
+    CommentResponse,
+)
+from config.database import async_db_dependency, async_read_db_dependency
+from utils.generate_url import build_cursor_urls
+from utils.loaders_handler import comment_load_options
+from utils.pagination_handler import fetch_keyset_page
+from utils.write_behind_handler import WRITE_BEHIND_ENABLED, write_behind
 
 router = APIRouter()
 
-@router.post("/comments", tags=["comments"], response_model=CommentResponse)
+
+def author_name(first_name: str, last_name: str) -> str:
+    return f"{first_name} {last_name}".strip()
+
+
+def comment_response(db, comment_id: int) -> CommentResponse:
+    return CommentResponse.model_validate(
+        db.query(Comment)
+        .options(*comment_load_options())
+        .populate_existing()
+        .filter(Comment.id == comment_id)
+        .one()
+    )
+
+
+@router.post(
+    "/comments",
+    tags=["comments"],
+    response_model=Union[CommentResponse, CommentFeedItem],
+)
 async def create_comment(
     comment: CommentCreate,
-    db: db_dependency,
+    db: async_db_dependency,
+    slim: bool = Query(False),
     current_user: User = Depends(get_current_active_user),
 ):
 
-    professional_service = (
-        db.query(ProfessionalService)
-        .filter(ProfessionalService.id == comment.professional_service_id)
-        .first()
+    professional_service = await db.get(
+        ProfessionalService, comment.professional_service_id
     )
     if not professional_service:
         raise GenericException(
             message="Service not found", code=status.HTTP_404_NOT_FOUND
         )
 
-    db_comment = Comment(**comment.model_dump(), user_id=current_user.id)
+    if WRITE_BEHIND_ENABLED:
+        write_behind.submit_comment(
+            {**comment.model_dump(exclude={"user_id"}), "user_id": current_user.id}
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED, content={"detail": "Comment accepted"}
+        )
+
+    db_comment = Comment(
+        **comment.model_dump(exclude={"user_id"}), user_id=current_user.id
+    )
     db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
-    return db_comment
+    await db.commit()
+
+    if slim:
+        # The identity was loaded with its profile image, nothing to fetch
+        profile_image = current_user.profile_image
+        return CommentFeedItem(
+            id=db_comment.id,
+            text=comment.text,
+            rating=comment.rating,
+            author_name=author_name(current_user.first_name, current_user.last_name),
+            avatar_url=profile_image.url if profile_image else None,
+        )
+
+    return await db.run_sync(comment_response, db_comment.id)
+
+
+def service_comments_page(
+    db, request: Request, service_id: int, limit: int, cursor: Optional[str]
+) -> CommentFeedResponse:
+    # Newest first, one joined query served by (professional_service_id, id)
+    query = (
+        db.query(
+            Comment.id,
+            Comment.text,
+            Comment.rating,
+            User.first_name,
+            User.last_name,
+            ProfileImage.url,
+        )
+        .join(User, User.id == Comment.user_id)
+        .outerjoin(ProfileImage, ProfileImage.user_id == User.id)
+        .filter(Comment.professional_service_id == service_id)
+    )
+    rows, next_cursor = fetch_keyset_page(query, [Comment.id], cursor, limit)
+
+    _, next_page_url, _ = build_cursor_urls(request, cursor or "", next_cursor, limit)
+
+    return CommentFeedResponse(
+        next_page=next_page_url,
+        next_cursor=next_cursor,
+        items=[
+            CommentFeedItem(
+                id=row.id,
+                text=row.text,
+                rating=row.rating,
+                author_name=author_name(row.first_name, row.last_name),
+                avatar_url=row.url,
+            )
+            for row in rows
+        ],
+    )
+
+
+@router.get(
+    "/professional-services/{service_id}/comments",
+    tags=["comments"],
+    response_model=CommentFeedResponse,
+)
+async def get_service_comments(
+    service_id: int,
+    db: async_read_db_dependency,
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+):
+    return await db.run_sync(service_comments_page, request, service_id, limit, cursor)
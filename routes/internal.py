@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from routes.internals import common
+
+router = APIRouter()
+
+router.include_router(common.router)
@@ -0,0 +1,35 @@
+import os
+import secrets
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi import APIRouter, Header, status
+from config.database import ENGINES
+from custom_exceptions.users_exceptions import GenericException
+from utils.pool_stats_handler import pool_stats
+from utils.write_behind_handler import write_behind
+
+load_dotenv()
+
+# Unset disables the internal endpoints
+INTERNAL_STATS_TOKEN = os.getenv("INTERNAL_STATS_TOKEN")
+
+router = APIRouter()
+
+
+def verify_internal_token(token: Optional[str]):
+    if not INTERNAL_STATS_TOKEN:
+        raise GenericException(message="Not Found", code=status.HTTP_404_NOT_FOUND)
+    if not token or not secrets.compare_digest(token, INTERNAL_STATS_TOKEN):
+        raise GenericException(message="Forbidden", code=status.HTTP_403_FORBIDDEN)
+
+
+@router.get("/internal/pool-stats", tags=["internal"], include_in_schema=False)
+def get_pool_stats(x_internal_token: Optional[str] = Header(None)):
+    verify_internal_token(x_internal_token)
+    return {"pid": os.getpid(), "engines": pool_stats(ENGINES)}
+
+
+@router.get("/internal/write-behind-stats", tags=["internal"], include_in_schema=False)
+def get_write_behind_stats(x_internal_token: Optional[str] = Header(None)):
+    verify_internal_token(x_internal_token)
+    return {"pid": os.getpid(), **write_behind.stats()}
@@ -1,14 +1,290 @@
-from fastapi import APIRouter, Query, Request, status
-from sqlalchemy import text
+from typing import Hashable, List, Literal, Optional, Tuple
+import numpy as np
+from fastapi import APIRouter, Depends, Query, Request, status
 from custom_exceptions.users_exceptions import GenericException
 from models.professional_services import ProfessionalService
 from schemas.paginated_schema import PaginatedResponse
-from config.database import db_dependency
+from models.rating_histograms import RatingHistogram
+from schemas.profesional_service_schema import (
+    ProfessionalServiceResponse,
+    RatingHistogramResponse,
+)
+from config.database import async_read_db_dependency
+from utils.count_cache_handler import cached_count, geo_count_key, listing_count_key
+from utils.filters_handler import ServiceFilters, subcategory_facets
 from utils.generate_url import build_pagination_urls
+from utils.geo_handler import filter_within_range, haversine_km, select_nearest
+from utils.geo_index_handler import (
+    GEO_INDEX_ENABLED,
+    geo_index,
+    services_within_range,
+)
+from utils.leaderboard_handler import top_rated_service_ids
+from utils.loaders_handler import service_load_options
+from utils.pagination_handler import (
+    decode_cursor,
+    encode_cursor,
+    fetch_keyset_page,
+    fetch_offset_page,
+)
+from utils.search_handler import with_search_score
 
 
 router = APIRouter()
 
+SERVICES_SORT_KEYS = [ProfessionalService.average_rating, ProfessionalService.id]
+
+
+def paginate_services(
+    query,
+    request: Request,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    count_key: Hashable,
+    include_total: bool = True,
+    origin: Optional[Tuple[float, float]] = None,
+    sort_keys: List = SERVICES_SORT_KEYS,
+) -> PaginatedResponse:
+    total = cached_count(count_key, query.count) if include_total else None
+    query = query.options(*service_load_options())
+
+    if cursor is not None:
+        services, next_cursor = fetch_keyset_page(query, sort_keys, cursor, limit)
+    else:
+        services, next_cursor = fetch_offset_page(query, sort_keys, offset, limit)
+
+    if origin:
+        for service in services:
+            service.distance_km = round(
+                haversine_km(service.latitude, service.longitude, *origin), 3
+            )
+
+    return build_services_page(
+        request, limit, offset, cursor, total, services, next_cursor
+    )
+
+
+def paginate_services_by_distance(
+    db,
+    request: Request,
+    lat: float,
+    lon: float,
+    range_km: float,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    include_total: bool = True,
+    filtered_query=None,
+) -> PaginatedResponse:
+    ids, distances = services_within_range(db, lat, lon, range_km)
+    if filtered_query is not None:
+        # Other filters are resolved by the DB over the geo candidates only
+        allowed_ids = [
+            row[0]
+            for row in filtered_query.filter(
+                ProfessionalService.id.in_(ids.tolist())
+            ).with_entities(ProfessionalService.id)
+        ]
+        in_filter = np.isin(ids, allowed_ids)
+        ids, distances = ids[in_filter], distances[in_filter]
+    total = len(ids) if include_total else None
+
+    if cursor is not None:
+        after = tuple(decode_cursor(cursor, 2)) if cursor else None
+        page_ids, page_distances = select_nearest(ids, distances, limit + 1, after)
+    else:
+        page_ids, page_distances = select_nearest(ids, distances, offset + limit + 1)
+        page_ids, page_distances = page_ids[offset:], page_distances[offset:]
+
+    next_cursor = None
+    if len(page_ids) > limit:
+        page_ids, page_distances = page_ids[:limit], page_distances[:limit]
+        next_cursor = encode_cursor([float(page_distances[-1]), int(page_ids[-1])])
+
+    services_by_id = {
+        service.id: service
+        for service in db.query(ProfessionalService)
+        .options(*service_load_options())
+        .filter(ProfessionalService.id.in_(page_ids.tolist()))
+    }
+    services = []
+    for service_id, distance in zip(page_ids.tolist(), page_distances.tolist()):
+        service = services_by_id.get(service_id)
+        if service is not None:
+            service.distance_km = round(distance, 3)
+            services.append(service)
+
+    return build_services_page(
+        request, limit, offset, cursor, total, services, next_cursor
+    )
+
+
+def build_services_page(
+    request: Request,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    total: Optional[int],
+    services,
+    next_cursor: Optional[str],
+) -> PaginatedResponse:
+    total_pages = (total + limit - 1) // limit if total is not None else None
+
+    current_page_url, next_page_url, prev_page_url = build_pagination_urls(
+        request,
+        offset,
+        limit,
+        total,
+        cursor=cursor,
+        next_cursor=next_cursor,
+        has_next=next_cursor is not None,
+    )
+
+    return PaginatedResponse(
+        total_items=total,
+        total_pages=total_pages,
+        current_page=current_page_url,
+        next_page=next_page_url,
+        prev_page=prev_page_url,
+        next_cursor=next_cursor,
+        items=services,
+    )
+
+
+def filter_by_location(db, query, lat: float, lon: float, range_km: float):
+    if GEO_INDEX_ENABLED:
+        service_ids, _ = geo_index.within(lat, lon, range_km)
+        return query.filter(ProfessionalService.id.in_(service_ids.tolist()))
+
+    return filter_within_range(
+        query,
+        db.bind.dialect.name,
+        ProfessionalService.latitude,
+        ProfessionalService.longitude,
+        lat,
+        lon,
+        range_km,
+    )
+
+
+def with_relevance(db, query, filters: ServiceFilters):
+    if not filters.q:
+        return query, SERVICES_SORT_KEYS
+
+    query, score = with_search_score(db, query, filters.q)
+    return query, [score, *SERVICES_SORT_KEYS]
+
+
+def list_services(
+    db,
+    request: Request,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    include_total: bool,
+    include_facets: bool,
+    filters: ServiceFilters,
+) -> PaginatedResponse:
+    base_query = filters.apply(db, db.query(ProfessionalService), False)
+    query, sort_keys = with_relevance(
+        db, filters.apply_subcategory(base_query), filters
+    )
+
+    page = paginate_services(
+        query,
+        request,
+        limit,
+        offset,
+        cursor,
+        count_key=listing_count_key(**filters.cache_key_items()),
+        include_total=include_total,
+        sort_keys=sort_keys,
+    )
+    if include_facets:
+        page.facets = subcategory_facets(base_query)
+    return page
+
+
+def list_services_in_range(
+    db,
+    request: Request,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    lat: float,
+    lon: float,
+    range_km: float,
+    sort: str,
+    include_total: bool,
+    include_facets: bool,
+    filters: ServiceFilters,
+) -> PaginatedResponse:
+    base_query = filters.apply(db, db.query(ProfessionalService), False)
+    geo_query = filter_by_location(db, base_query, lat, lon, range_km)
+
+    if sort == "distance":
+        page = paginate_services_by_distance(
+            db,
+            request,
+            lat,
+            lon,
+            range_km,
+            limit,
+            offset,
+            cursor,
+            include_total=include_total,
+            filtered_query=(
+                filters.apply_subcategory(base_query) if filters.active else None
+            ),
+        )
+    else:
+        query, sort_keys = with_relevance(
+            db, filters.apply_subcategory(geo_query), filters
+        )
+        page = paginate_services(
+            query,
+            request,
+            limit,
+            offset,
+            cursor,
+            count_key=geo_count_key(lat, lon, range_km, **filters.cache_key_items()),
+            include_total=include_total,
+            origin=(lat, lon),
+            sort_keys=sort_keys,
+        )
+
+    if include_facets:
+        page.facets = subcategory_facets(geo_query)
+    return page
+
+
+def leaderboard_services(
+    db, city: str, subcategory_id: int, limit: int
+) -> List[ProfessionalServiceResponse]:
+    service_ids = top_rated_service_ids(db, city, subcategory_id, limit)
+    if not service_ids:
+        return []
+
+    services_by_id = {
+        service.id: service
+        for service in db.query(ProfessionalService)
+        .options(*service_load_options())
+        .filter(ProfessionalService.id.in_(service_ids))
+    }
+    return [
+        ProfessionalServiceResponse.model_validate(services_by_id[service_id])
+        for service_id in service_ids
+        if service_id in services_by_id
+    ]
+
+
+# The listing helpers are written against the sync Session API. The async
+# routes run them through AsyncSession.run_sync, which awaits the async
+# driver for every statement, so the event loop is free while the DB works.
+# Responses are built inside run_sync so that nothing touches the ORM
+# objects once the greenlet has returned.
+
 
 @router.get(
     "/professional-services",
@@ -16,30 +292,28 @@ router = APIRouter()
     response_model=PaginatedResponse,
 )
 async def get_professional_services(
-    db: db_dependency,
+    db: async_read_db_dependency,
     request: Request,
     limit: int = Query(15),
     offset: int = Query(0),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
+    include_facets: bool = Query(False),
+    filters: ServiceFilters = Depends(),
 ):
     try:
-        query = db.query(ProfessionalService)
-        total = query.count()
-        services = query.limit(limit).offset(offset).all()
-
-        total_pages = (total + limit - 1) // limit
-
-        current_page_url, next_page_url, prev_page_url = build_pagination_urls(
-            request, offset, limit, total
-        )
-
-        return PaginatedResponse(
-            total_items=total,
-            total_pages=total_pages,
-            current_page=current_page_url,
-            next_page=next_page_url,
-            prev_page=prev_page_url,
-            items=services,
+        return await db.run_sync(
+            list_services,
+            request,
+            limit,
+            offset,
+            cursor,
+            include_total,
+            include_facets,
+            filters,
         )
+    except GenericException:
+        raise
     except Exception as exc:
         raise GenericException(
             message="Something went wrong", code=status.HTTP_400_BAD_REQUEST
@@ -52,45 +326,68 @@ async def get_professional_services(
     tags=["professional_services"],
     response_model=PaginatedResponse,
 )
-def get_services(
-    db: db_dependency,
+async def get_services(
+    db: async_read_db_dependency,
     request: Request,
     limit: int = Query(15),
     offset: int = Query(0),
+    cursor: Optional[str] = Query(None),
     lat: float = Query(...),
     lon: float = Query(...),
     range_km: float = Query(...),
+    sort: Literal["rating", "distance"] = Query("rating"),
+    include_total: bool = Query(True),
+    include_facets: bool = Query(False),
+    filters: ServiceFilters = Depends(),
 ):
 
     try:
-        query = (
-            db.query(ProfessionalService)
-            .filter(
-                text(
-                    "ST_Distance_Sphere(point(longitude, latitude), point(:lon, :lat)) <= :range_km * 1000"
-                )
-            )
-            .params(lon=lon, lat=lat, range_km=range_km)
+        return await db.run_sync(
+            list_services_in_range,
+            request,
+            limit,
+            offset,
+            cursor,
+            lat,
+            lon,
+            range_km,
+            sort,
+            include_total,
+            include_facets,
+            filters,
+        )
+    except GenericException:
+        raise
+    except Exception as exc:
+        raise GenericException(
+            message="Something went wrong", code=status.HTTP_400_BAD_REQUEST
         )
 
-        total = query.count()
 
-        services = query.limit(limit).offset(offset).all()
-        total_pages = (total + limit - 1) // limit
+@router.get(
+    "/professional-services/leaderboard",
+    name="Top rated services by city and subcategory",
+    tags=["professional_services"],
+    response_model=List[ProfessionalServiceResponse],
+)
+async def get_leaderboard(
+    db: async_read_db_dependency,
+    city: str = Query(..., min_length=1, max_length=100),
+    subcategory_id: int = Query(...),
+    limit: int = Query(10, ge=1, le=50),
+):
+    return await db.run_sync(leaderboard_services, city, subcategory_id, limit)
 
-        current_page_url, next_page_url, prev_page_url = build_pagination_urls(
-            request, offset, limit, total
-        )
 
-        return PaginatedResponse(
-            total_items=total,
-            total_pages=total_pages,
-            current_page=current_page_url,
-            next_page=next_page_url,
-            prev_page=prev_page_url,
-            items=services,
-        )
-    except Exception as exc:
+@router.get(
+    "/professional-services/{service_id}/rating-histogram",
+    tags=["professional_services"],
+    response_model=RatingHistogramResponse,
+)
+async def get_rating_histogram(service_id: int, db: async_read_db_dependency):
+    histogram = await db.get(RatingHistogram, service_id)
+    if not histogram:
         raise GenericException(
-            message="Something went wrong", code=status.HTTP_400_BAD_REQUEST
+            message="Service not found", code=status.HTTP_404_NOT_FOUND
         )
+    return histogram
@@ -1,59 +1,37 @@
 import uuid
-from fastapi import APIRouter, Depends, File, Request, UploadFile, status
+from fastapi import APIRouter, Depends, File, UploadFile, status
 from config.files import UPLOAD_DIRECTORY_SERVICES
 from custom_exceptions.users_exceptions import GenericException
 from models.professional_services import ProfessionalService, WorkSchedule
 from models.service_images import ServiceImage
 from models.subcategories import SubCategory
-from models.users import User
 from schemas.profesional_service_schema import (
     ImageUpdatedResponse,
     ProfessionalServiceCreate,
     ProfessionalServiceResponse,
 )
-from config.database import db_dependency
+from config.database import async_db_dependency, db_dependency
 from typing import List
-from utils.getters_handler import get_current_user, get_user_by_email
 from PIL import Image
 import aiofiles
 import os
 
+from utils.availability_handler import index_service_availability
+from utils.geo_index_handler import GEO_INDEX_ENABLED, geo_index
+from utils.identity_handler import get_current_principal
 from utils.images_handler import save_images, validate_images
+from utils.leaderboard_handler import add_to_leaderboard
+from utils.loaders_handler import service_load_options
+from utils.principal_cache_handler import Principal
+from utils.ratings_handler import add_histogram
+from utils.search_handler import index_service
 
 router = APIRouter()
 
 
-async def get_current_active_user(
-    request: Request, db: db_dependency, current_user: str = Depends(get_current_user)
-):
-    user = get_user_by_email(db, current_user)
-    if not user:
-        raise GenericException(
-            message="User not exists", code=status.HTTP_404_NOT_FOUND
-        )
-    if not user.is_active:
-        raise GenericException(
-            message="User is suspended", code=status.HTTP_403_FORBIDDEN
-        )
-    return user
-
-
-@router.post(
-    "/professional-services",
-    tags=["professional_services"],
-    response_model=ProfessionalServiceResponse,
-)
-async def create_professional_service(
-    service: ProfessionalServiceCreate,
-    db: db_dependency,
-    current_user: User = Depends(get_current_active_user),
-):
-
-    if current_user.role.name != "professional":
-        raise GenericException(
-            message="Not authorized to create services", code=status.HTTP_403_FORBIDDEN
-        )
-
+def save_professional_service(
+    db, service: ProfessionalServiceCreate, professional_id: int
+) -> ProfessionalServiceResponse:
     subcategory = (
         db.query(SubCategory).filter(SubCategory.id == service.subcategory_id).first()
     )
@@ -72,13 +50,14 @@ async def create_professional_service(
             latitude=service.latitude,
             longitude=service.longitude,
             subcategory_id=service.subcategory_id,
-            professional_id=current_user.id
+            professional_id=professional_id
         )
         db.add(db_service)
         db.commit()
         db.refresh(db_service)
 
         # Crear los WorkSchedules
+        index_service_availability(db, db_service.id, service.work_schedules)
         for schedule in service.work_schedules:
             db_schedule = WorkSchedule(
                 day_of_week=schedule.day_of_week,
@@ -88,28 +67,49 @@ async def create_professional_service(
                 professional_service_id=db_service.id
             )
             db.add(db_schedule)
-        
+
+        index_service(db, db_service)
+        add_to_leaderboard(db, db_service)
+        add_histogram(db, db_service)
         db.commit()
     except:
         db.rollback()
         raise
 
-    db.refresh(db_service)
-    return db_service
+    return ProfessionalServiceResponse.model_validate(
+        db.query(ProfessionalService)
+        .options(*service_load_options())
+        .populate_existing()
+        .filter(ProfessionalService.id == db_service.id)
+        .one()
+    )
 
 
 @router.post(
-    "/upload-images/{service_id}",
+    "/professional-services",
     tags=["professional_services"],
-    response_model=ImageUpdatedResponse,
+    response_model=ProfessionalServiceResponse,
 )
-async def upload_images(
-    service_id: int,
-    db: db_dependency,
-    files: List[UploadFile] = File(...),
-    current_user: User = Depends(get_current_active_user),
+async def create_professional_service(
+    service: ProfessionalServiceCreate,
+    db: async_db_dependency,
+    principal: Principal = Depends(get_current_principal),
 ):
 
+    if principal.role_name != "professional":
+        raise GenericException(
+            message="Not authorized to create services", code=status.HTTP_403_FORBIDDEN
+        )
+
+    created = await db.run_sync(save_professional_service, service, principal.user_id)
+
+    if GEO_INDEX_ENABLED:
+        geo_index.upsert(created.id, created.latitude, created.longitude)
+
+    return created
+
+
+def service_images_count(db, service_id: int, professional_id: int) -> int:
     professional_service = (
         db.query(ProfessionalService)
         .filter(ProfessionalService.id == service_id)
@@ -118,14 +118,29 @@ async def upload_images(
 
     if (
         not professional_service
-        or professional_service.professional_id != current_user.id
+        or professional_service.professional_id != professional_id
     ):
         raise GenericException(
             message="Error trying to update", code=status.HTTP_401_UNAUTHORIZED
         )
 
-    existing_images_count = (
-        db.query(ServiceImage).filter(ServiceImage.service_id == service_id).count()
+    return db.query(ServiceImage).filter(ServiceImage.service_id == service_id).count()
+
+
+@router.post(
+    "/upload-images/{service_id}",
+    tags=["professional_services"],
+    response_model=ImageUpdatedResponse,
+)
+async def upload_images(
+    service_id: int,
+    db: async_db_dependency,
+    files: List[UploadFile] = File(...),
+    principal: Principal = Depends(get_current_principal),
+):
+
+    existing_images_count = await db.run_sync(
+        service_images_count, service_id, principal.user_id
     )
     if existing_images_count >= 10:
         raise GenericException(
@@ -145,10 +160,8 @@ async def upload_images(
 
     for file_name in uploaded_files:
         image_url = f"/uploaded_images/services/{file_name}"
-        service_image = ServiceImage(url=image_url, service_id=service_id)
-        db.add(service_image)
-        db.commit()
-        db.refresh(service_image)
+        db.add(ServiceImage(url=image_url, service_id=service_id))
+    await db.commit()
 
     response = ImageUpdatedResponse(
         detail="Images uploaded successfully",
@@ -160,10 +173,10 @@ async def upload_images(
 
 
 @router.delete("/delete-image/{image_id}", tags=["professional_services"])
-async def delete_image(
+def delete_image(
     image_id: int,
     db: db_dependency,
-    current_user: User = Depends(get_current_active_user),
+    principal: Principal = Depends(get_current_principal),
 ):
 
     service_image = db.query(ServiceImage).filter(ServiceImage.id == image_id).first()
@@ -179,7 +192,7 @@ async def delete_image(
         .first()
     )
 
-    if professional_service.professional_id != current_user.id:
+    if professional_service.professional_id != principal.user_id:
         raise GenericException(
             message="You are not the owner of this service",
             code=status.HTTP_401_UNAUTHORIZED,
@@ -1,59 +1,87 @@
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from custom_exceptions.users_exceptions import GenericException
 from models.professional_services import ProfessionalService
 from models.ratings import Rating
-from models.users import User
-from routes.professional_services.protected import get_current_active_user
 from schemas.profesional_service_schema import RatingCreate, RatingResponse
-from config.database import db_dependency
+from config.database import async_db_dependency
+from utils.identity_handler import get_current_principal
+from utils.leaderboard_handler import record_rating
+from utils.loaders_handler import rating_load_options
+from utils.principal_cache_handler import Principal
+from utils.ratings_handler import apply_histogram, apply_ratings, star_counts
+from utils.write_behind_handler import WRITE_BEHIND_ENABLED, write_behind
 
 router = APIRouter()
 
+
+def save_rating(db, rating: RatingCreate, user_id: int) -> RatingResponse:
+    db_rating = Rating(**rating.model_dump(exclude={"user_id"}), user_id=user_id)
+    try:
+        db.add(db_rating)
+        apply_ratings(db, rating.professional_service_id, rating.rating)
+        apply_histogram(
+            db, rating.professional_service_id, star_counts([rating.rating])
+        )
+        record_rating(db, rating.professional_service_id)
+        db.commit()
+    except IntegrityError:
+        # A concurrent request rated first; the unique index rejected this one
+        db.rollback()
+        raise GenericException(
+            message="You have already rated this service",
+            code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return RatingResponse.model_validate(
+        db.query(Rating)
+        .options(*rating_load_options())
+        .populate_existing()
+        .filter(Rating.id == db_rating.id)
+        .one()
+    )
+
+
 @router.post("/ratings", tags=["ratings"], response_model=RatingResponse)
 async def create_rating(
     rating: RatingCreate,
-    db: db_dependency,
-    current_user: User = Depends(get_current_active_user),
+    db: async_db_dependency,
+    principal: Principal = Depends(get_current_principal),
 ):
 
-    professional_service = (
-        db.query(ProfessionalService)
-        .filter(ProfessionalService.id == rating.professional_service_id)
-        .first()
+    professional_service = await db.get(
+        ProfessionalService, rating.professional_service_id
     )
     if not professional_service:
         raise GenericException(
             message="Service not found", code=status.HTTP_404_NOT_FOUND
         )
 
-    existing_rating = (
-        db.query(Rating)
-        .filter(
-            Rating.user_id == current_user.id,
+    existing_rating = await db.scalar(
+        select(Rating.id).where(
+            Rating.user_id == principal.user_id,
             Rating.professional_service_id == rating.professional_service_id,
         )
-        .first()
     )
 
-    if existing_rating:
+    if existing_rating or write_behind.has_pending_rating(
+        principal.user_id, rating.professional_service_id
+    ):
         raise GenericException(
             message="You have already rated this service",
             code=status.HTTP_400_BAD_REQUEST,
         )
 
-    db_rating = Rating(**rating.model_dump(), user_id=current_user.id)
-    db.add(db_rating)
-    db.commit()
-
-    ratings = (
-        db.query(Rating)
-        .filter(Rating.professional_service_id == rating.professional_service_id)
-        .all()
-    )
-    average_rating = sum(r.rating for r in ratings) / len(ratings)
-
-    professional_service.average_rating = average_rating
-    db.commit()
+    # The write-behind queue lives on the event loop, so this handler stays
+    # async and runs the sync write path through run_sync
+    if WRITE_BEHIND_ENABLED:
+        write_behind.submit_rating(
+            {**rating.model_dump(exclude={"user_id"}), "user_id": principal.user_id}
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED, content={"detail": "Rating accepted"}
+        )
 
-    db.refresh(db_rating)
-    return db_rating
+    return await db.run_sync(save_rating, rating, principal.user_id)
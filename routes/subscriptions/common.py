@@ -1,10 +1,13 @@
 
 from typing import List
 from fastapi import APIRouter
-from config.database import db_dependency
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from config.database import async_read_db_dependency
 from models import subscriptions
 from schemas import subscription_schema
 from schemas.user_schema import SubscriptionBoughtHistoryResponse
+from utils.loaders_handler import user_load_options
 
 
 router = APIRouter()
@@ -14,10 +17,19 @@ router = APIRouter()
     tags=["subscription"],
     response_model=List[subscription_schema.SubscriptionTypeResponse],
 )
-def get_all_subscriptions(db: db_dependency):
-    return db.query(subscriptions.SubscriptionType).all()
+async def get_all_subscriptions(db: async_read_db_dependency):
+    return (await db.scalars(select(subscriptions.SubscriptionType))).all()
 
 
 @router.get("/subscriptions-history", tags=["subscription"], response_model=List[SubscriptionBoughtHistoryResponse])
-def get_history_subscriptions(db:db_dependency):
-    return db.query(subscriptions.SubscriptionBoughtHistory).all()
+async def get_history_subscriptions(db: async_read_db_dependency):
+    return (
+        await db.scalars(
+            select(subscriptions.SubscriptionBoughtHistory).options(
+                joinedload(subscriptions.SubscriptionBoughtHistory.user).options(
+                    *user_load_options()
+                ),
+                joinedload(subscriptions.SubscriptionBoughtHistory.subscription_type),
+            )
+        )
+    ).all()
@@ -4,9 +4,10 @@ from config.database import db_dependency
 from custom_exceptions.users_exceptions import GenericException
 from models import subscriptions
 from models.users import User
-from routes.professional_services.protected import get_current_active_user
+from utils.identity_handler import get_current_active_user
 from schemas import subscription_schema
 from schemas.user_schema import UserResponse
+from utils.principal_cache_handler import invalidate_principal
 
 router = APIRouter()
 
@@ -63,5 +64,6 @@ def adding_user_sub(
         db.commit()
         db.refresh(new_subscription)
 
+    invalidate_principal(current_user.email)
     db.refresh(current_user)
     return current_user
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Cookie, Response, status, Request
+from fastapi import APIRouter, Cookie, Depends, Response, status, Request
 from fastapi.responses import RedirectResponse
 from jose import JWTError
 from custom_exceptions.users_exceptions import GenericException
@@ -6,17 +6,33 @@ from models.users import User
 from models.roles import Role
 from schemas.user_schema import RoleResponse, UserCreate, UserResponse, LoginForm
 from schemas.token_schema import Token
-from config.database import db_dependency
-from typing import List
+from sqlalchemy import select
+from config.database import (
+    async_db_dependency,
+    async_read_db_dependency,
+    db_dependency,
+)
+from typing import List, Optional
 from utils.error_handler import validation_error_response
-from utils.getters_handler import get_role_by_id, get_user_by_email, get_user_by_id
+from utils.getters_handler import (
+    get_role_by_id,
+    get_user_by_email,
+    oauth2_scheme,
+)
 from utils.google_handlers import (
     fetch_google_tokens,
     get_google_auth_url,
     verify_google_id_token,
 )
 from utils.jwt_handler import create_access_token, create_refresh_token, verify_token
-from utils.password_handler import verify_password, hash_password
+from utils.loaders_handler import user_load_options
+from utils.password_handler import (
+    hash_password_async,
+    login_slot,
+    password_needs_rehash,
+    verify_password_async,
+)
+from utils.revocation_handler import revoke_token
 
 router = APIRouter()
 
@@ -27,24 +43,25 @@ router = APIRouter()
     responses=validation_error_response,
     status_code=status.HTTP_201_CREATED,
 )
-async def create_users(user: UserCreate, db: db_dependency, response: Response):
+async def create_users(
+    user: UserCreate, db: async_db_dependency, response: Response
+):
 
-    if get_user_by_email(db, user.email):
+    if await db.run_sync(get_user_by_email, user.email):
         raise GenericException(
             message="Email already registered", code=status.HTTP_400_BAD_REQUEST
         )
 
-    role = get_role_by_id(db, user.role_id)
+    role = await db.run_sync(get_role_by_id, user.role_id)
     if not role:
         raise GenericException(
             message="Role not exists", code=status.HTTP_404_NOT_FOUND
         )
 
     db_user = User(**user.model_dump())
-    db_user.password = hash_password(user.password)
+    db_user.password = await hash_password_async(user.password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
 
     access_token = create_access_token(data={"sub": db_user.email})
     refresh_token = create_refresh_token(data={"sub": user.email})
@@ -58,21 +75,28 @@ async def create_users(user: UserCreate, db: db_dependency, response: Response):
     "/login", tags=["users"], response_model=Token, responses=validation_error_response
 )
 async def login_for_access_token(
-    db: db_dependency, form_data: LoginForm, response: Response
+    db: async_db_dependency, form_data: LoginForm, response: Response
 ):
 
-    user = get_user_by_email(db, form_data.email)
-
-    if (
-        not user
-        or not user.password
-        or not verify_password(form_data.password, user.password)
-    ):
-        raise GenericException(
-            message="Incorrect email or password", code=status.HTTP_401_UNAUTHORIZED
-        )
-
-    elif not user.is_active:
+    async with login_slot():
+        user = await db.run_sync(get_user_by_email, form_data.email)
+
+        if (
+            not user
+            or not user.password
+            or not await verify_password_async(form_data.password, user.password)
+        ):
+            raise GenericException(
+                message="Incorrect email or password",
+                code=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        # Moves old hashes to the current BCRYPT_ROUNDS as users log in
+        if password_needs_rehash(user.password):
+            user.password = await hash_password_async(form_data.password)
+            await db.commit()
+
+    if not user.is_active:
         raise GenericException(
             message="User is suspended", code=status.HTTP_400_BAD_REQUEST
         )
@@ -91,9 +115,11 @@ async def login_for_access_token(
     response_model=UserResponse,
     responses=validation_error_response,
 )
-async def read_user(id: int, db: db_dependency):
+async def read_user(id: int, db: async_read_db_dependency):
 
-    user = get_user_by_id(db, id)
+    user = await db.scalar(
+        select(User).options(*user_load_options()).where(User.id == id)
+    )
     if user:
         return user
     else:
@@ -108,9 +134,9 @@ async def read_user(id: int, db: db_dependency):
     response_model=List[RoleResponse],
     responses=validation_error_response,
 )
-async def get_roles(db: db_dependency):
+async def get_roles(db: async_read_db_dependency):
     try:
-        return db.query(Role).all()
+        return (await db.scalars(select(Role))).all()
     except Exception as exc:
         raise GenericException(
             message="Something went wrong", code=status.HTTP_400_BAD_REQUEST
@@ -138,6 +164,27 @@ async def refresh_access_token(refresh_token: str = Cookie(...)):
         )
 
 
+@router.post("/logout", tags=["users"], responses=validation_error_response)
+def logout(
+    db: db_dependency,
+    response: Response,
+    token: str = Depends(oauth2_scheme),
+    refresh_token: Optional[str] = Cookie(None),
+):
+    revoke_token(db, verify_token(token, "access"))
+
+    if refresh_token:
+        try:
+            revoke_token(db, verify_token(refresh_token, "refresh"))
+        except GenericException:
+            # Already expired or revoked
+            pass
+
+    response.delete_cookie(key="refresh_token", httponly=True)
+
+    return {"detail": "Logged out"}
+
+
 # Google auth
 @router.get("/login/google", tags=["users"])
 async def google_login():
@@ -160,7 +207,7 @@ async def google_login():
     response_model=Token,
     responses=validation_error_response,
 )
-async def auth_callback(request: Request, db: db_dependency):
+async def auth_callback(request: Request, db: async_db_dependency):
 
     code = request.query_params.get("code")
     if not code:
@@ -168,7 +215,7 @@ async def auth_callback(request: Request, db: db_dependency):
             message="Authorization code not provided", code=status.HTTP_404_NOT_FOUND
         )
 
-    token_response_data = fetch_google_tokens(code)
+    token_response_data = await fetch_google_tokens(code)
 
     if "error" in token_response_data:
         raise GenericException(
@@ -181,11 +228,11 @@ async def auth_callback(request: Request, db: db_dependency):
             message="ID token not provided", code=status.HTTP_400_BAD_REQUEST
         )
 
-    id_info = verify_google_id_token(id_token_str)
+    id_info = await verify_google_id_token(id_token_str)
     user_email = id_info["email"]
     google_id = id_info["sub"]
 
-    user = get_user_by_email(db, user_email)
+    user = await db.run_sync(get_user_by_email, user_email)
     if not user:
         user = User(
             email=user_email,
@@ -197,13 +244,11 @@ async def auth_callback(request: Request, db: db_dependency):
             role_id=1,
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
     else:
         if user.google_id != google_id:
             user.google_id = google_id
-            db.commit()
-            db.refresh(user)
+            await db.commit()
 
     access_token = create_access_token(data={"sub": user.email})
     refresh_token = create_refresh_token(data={"sub": user.email})
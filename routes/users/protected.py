@@ -1,5 +1,6 @@
 import os
-from fastapi import APIRouter, Depends, File, Request, UploadFile, status
+from fastapi import APIRouter, Depends, File, UploadFile, status
+from starlette.concurrency import run_in_threadpool
 from config.files import UPLOAD_DIRECTORY_PROFILES
 from custom_exceptions.users_exceptions import GenericException
 from custom_exceptions.users_exceptions import GenericException
@@ -16,26 +17,14 @@ from schemas.user_schema import (
 )
 from config.database import db_dependency
 from utils.error_handler import validation_error_response
-from utils.getters_handler import get_current_user, get_role_by_id, get_user_by_email
+from utils.getters_handler import get_role_by_id
+from utils.identity_handler import get_current_active_user
 from utils.images_handler import save_images, validate_images
-from utils.password_handler import verify_password, hash_password
+from utils.password_handler import hash_password_async, verify_password_async
+from utils.principal_cache_handler import invalidate_principal
 
 router = APIRouter()
 
-async def get_current_active_user(
-    request: Request, db: db_dependency, current_user: str = Depends(get_current_user)
-):
-    user = get_user_by_email(db, current_user)
-    if not user:
-        raise GenericException(
-            message="User not exists", code=status.HTTP_404_NOT_FOUND
-        )
-    if not user.is_active:
-        raise GenericException(
-            message="User is suspended", code=status.HTTP_403_FORBIDDEN
-        )
-    return user
-
 
 @router.put(
     "/users",
@@ -43,7 +32,7 @@ async def get_current_active_user(
     response_model=UserResponse,
     responses=validation_error_response,
 )
-async def update_user(
+def update_user(
     user_update: UserUpdate,
     db: db_dependency,
     current_user: User = Depends(get_current_active_user),
@@ -71,7 +60,7 @@ async def update_user(
     response_model=UserResponse,
     responses=validation_error_response,
 )
-async def change_user_role(
+def change_user_role(
     db: db_dependency,
     request: ChangeRoleRequest,
     current_user: User = Depends(get_current_active_user),
@@ -80,6 +69,7 @@ async def change_user_role(
     if new_role:
         current_user.role = new_role
         db.commit()
+        invalidate_principal(current_user.email)
         db.refresh(current_user)
         return current_user
     else:
@@ -94,7 +84,7 @@ async def change_user_role(
     response_model=UserResponse,
     responses=validation_error_response,
 )
-async def suspend_user(
+def suspend_user(
     db: db_dependency,
     request: SuspendUserRequest,
     current_user: User = Depends(get_current_active_user),
@@ -103,6 +93,7 @@ async def suspend_user(
     if current_user:
         current_user.is_active = request.is_active
         db.commit()
+        invalidate_principal(current_user.email)
         return current_user
     else:
         raise GenericException(
@@ -110,6 +101,18 @@ async def suspend_user(
         )
 
 
+# Handlers that await hashing or uploads run their queries on the
+# identity's sync session in the threadpool
+
+
+def save_password(db, user: User, hashed_password) -> UserResponse:
+    user.password = hashed_password
+    db.commit()
+    invalidate_principal(user.email)
+    db.refresh(user)
+    return UserResponse.model_validate(user)
+
+
 @router.put(
     "/user/change-password",
     tags=["users"],
@@ -127,7 +130,7 @@ async def change_password(
             message="You are registered by social", code=status.HTTP_401_UNAUTHORIZED
         )
 
-    if not verify_password(
+    if not await verify_password_async(
         change_password_request.current_password, current_user.password
     ):
         raise GenericException(
@@ -140,11 +143,9 @@ async def change_password(
             code=status.HTTP_400_BAD_REQUEST,
         )
 
-    current_user.password = hash_password(change_password_request.new_password)
+    hashed_password = await hash_password_async(change_password_request.new_password)
 
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    return await run_in_threadpool(save_password, db, current_user, hashed_password)
 
 
 @router.put(
@@ -153,7 +154,7 @@ async def change_password(
     response_model=UserResponse,
     responses=validation_error_response,
 )
-async def complete_profile(
+def complete_profile(
     complete_profile: CompleteProfile,
     db: db_dependency,
     current_user: User = Depends(get_current_active_user),
@@ -169,6 +170,24 @@ async def complete_profile(
     db.refresh(current_user)
     return current_user
 
+
+def delete_profile_image(db, user_id: int):
+    profile_image = db.query(ProfileImage).filter(ProfileImage.user_id == user_id).first()
+    if profile_image:
+        old_image_path = os.path.join(profile_image.url.strip("/"))
+        if os.path.exists(old_image_path):
+            os.remove(old_image_path)
+
+        # Delete the old profile image record from the database
+        db.delete(profile_image)
+        db.commit()
+
+
+def add_profile_image(db, user_id: int, url: str):
+    db.add(ProfileImage(url=url, user_id=user_id))
+    db.commit()
+
+
 @router.post(
     "/upload-profile-image",
     tags=["user_profile"],
@@ -185,27 +204,12 @@ async def upload_profile_image(
             message="No valid images to upload.",
             code=status.HTTP_400_BAD_REQUEST,
         )
-    profile_image = db.query(ProfileImage).filter(ProfileImage.user_id == current_user.id).first()
-    if profile_image:
-        old_image_path = os.path.join(profile_image.url.strip("/"))
-        if os.path.exists(old_image_path):
-            os.remove(old_image_path)
-        
-        # Delete the old profile image record from the database
-        db.delete(profile_image)
-        db.commit()
-    
-   
+    await run_in_threadpool(delete_profile_image, db, current_user.id)
 
     uploaded_files = await save_images(current_user.id, valid_files, directory="profiles")
 
     profile_image_url = f"/{UPLOAD_DIRECTORY_PROFILES}/{uploaded_files[0]}"
-    profile_image = ProfileImage(
-        url=profile_image_url,
-        user_id=current_user.id
-    )
-    db.add(profile_image)
-    db.commit()
+    await run_in_threadpool(add_profile_image, db, current_user.id, profile_image_url)
 
     response = ImageUpdatedResponse(
         detail="Profile image uploaded successfully",
@@ -214,3 +218,4 @@ async def upload_profile_image(
     )
 
     return response
+
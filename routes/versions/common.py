@@ -1,13 +1,16 @@
 from fastapi import APIRouter, status
-from config.database import db_dependency
+from sqlalchemy import select
+from config.database import async_read_db_dependency
 from custom_exceptions.users_exceptions import GenericException
 from models.versions import Version
 
 router = APIRouter()
 
 @router.get("/version", tags=["versions"])
-def get_latest_version(db: db_dependency):
-    version = db.query(Version).order_by(Version.release_date.desc()).first()
+async def get_latest_version(db: async_read_db_dependency):
+    version = await db.scalar(
+        select(Version).order_by(Version.release_date.desc()).limit(1)
+    )
     if not version:
         raise GenericException(
             message="There is not versions", code=status.HTTP_404_NOT_FOUND
@@ -17,8 +20,8 @@ def get_latest_version(db: db_dependency):
 
 
 @router.get("/check-version", tags=["versions"])
-def check_version(client_version: str, db: db_dependency):
-    latest_version = get_latest_version(db)
+async def check_version(client_version: str, db: async_read_db_dependency):
+    latest_version = await get_latest_version(db)
     if client_version != latest_version:
         return {"update_available": True, "latest_version": latest_version}
     else:
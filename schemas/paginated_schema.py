@@ -3,10 +3,17 @@ from typing import List, Optional
 from schemas.profesional_service_schema import ProfessionalServiceResponse
 
 
+class SubCategoryFacet(BaseModel):
+    subcategory_id: int
+    count: int
+
+
 class PaginatedResponse(BaseModel):
-    total_items: int
-    total_pages: int
+    total_items: Optional[int] = None
+    total_pages: Optional[int] = None
     current_page: AnyHttpUrl
     next_page: Optional[AnyHttpUrl]
     prev_page: Optional[AnyHttpUrl]
+    next_cursor: Optional[str] = None
     items: List[ProfessionalServiceResponse]
+    facets: Optional[List[SubCategoryFacet]] = None
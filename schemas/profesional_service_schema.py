@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field, ValidationInfo, field_validator, validator
+from pydantic import AnyHttpUrl, BaseModel, EmailStr, Field, ValidationInfo, field_validator, validator
 from datetime import date, time
 from typing import Optional, List
 from schemas.user_schema import UserResponse
@@ -70,6 +70,17 @@ class ServiceImageResponse(ServiceImageBase):
         from_attributes = True
 
 
+class RatingHistogramResponse(BaseModel):
+    stars_1: int
+    stars_2: int
+    stars_3: int
+    stars_4: int
+    stars_5: int
+
+    class Config:
+        from_attributes = True
+
+
 class ProfessionalServiceBase(BaseModel):
     name: str
     description: str
@@ -98,6 +109,8 @@ class ProfessionalServiceResponse(ProfessionalServiceBase):
     subcategory: SubCategoryResponse
     images: List[ServiceImageResponse]
     work_schedules: List[WorkScheduleResponse]
+    rating_histogram: Optional[RatingHistogramResponse] = None
+    distance_km: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -105,6 +118,7 @@ class ProfessionalServiceResponse(ProfessionalServiceBase):
 
 class CommentBase(BaseModel):
     text: str
+    rating: float
     user_id: int
     professional_service_id: int
 
@@ -122,6 +136,20 @@ class CommentResponse(CommentBase):
         from_attributes = True
 
 
+class CommentFeedItem(BaseModel):
+    id: int
+    text: str
+    rating: float
+    author_name: str
+    avatar_url: Optional[str] = None
+
+
+class CommentFeedResponse(BaseModel):
+    next_page: Optional[AnyHttpUrl]
+    next_cursor: Optional[str] = None
+    items: List[CommentFeedItem]
+
+
 class RatingBase(BaseModel):
     rating: float
     user_id: int
@@ -0,0 +1,176 @@
+-- The schema the app created before migrations existed (SQLite, from the
+-- baseline models). Databases deployed back then must upgrade cleanly.
+
+CREATE TABLE categories (
+    id INTEGER NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (name)
+);
+
+CREATE TABLE comments (
+    id INTEGER NOT NULL,
+    text VARCHAR(255) NOT NULL,
+    rating FLOAT NOT NULL,
+    user_id INTEGER NOT NULL,
+    professional_service_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id),
+    FOREIGN KEY(professional_service_id) REFERENCES professional_services (id)
+);
+
+CREATE TABLE professional_services (
+    id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    description VARCHAR(255) NOT NULL,
+    city VARCHAR(100) NOT NULL,
+    range_from INTEGER NOT NULL,
+    range_to INTEGER NOT NULL,
+    latitude FLOAT NOT NULL,
+    longitude FLOAT NOT NULL,
+    average_rating FLOAT,
+    professional_id INTEGER NOT NULL,
+    subcategory_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(professional_id) REFERENCES users (id),
+    FOREIGN KEY(subcategory_id) REFERENCES subcategories (id)
+);
+
+CREATE TABLE profile_images (
+    id INTEGER NOT NULL,
+    url VARCHAR(255) NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id)
+);
+
+CREATE TABLE ratings (
+    id INTEGER NOT NULL,
+    rating FLOAT NOT NULL,
+    user_id INTEGER NOT NULL,
+    professional_service_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id),
+    FOREIGN KEY(professional_service_id) REFERENCES professional_services (id)
+);
+
+CREATE TABLE roles (
+    id INTEGER NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (name)
+);
+
+CREATE TABLE service_images (
+    id INTEGER NOT NULL,
+    url VARCHAR(255) NOT NULL,
+    service_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(service_id) REFERENCES professional_services (id)
+);
+
+CREATE TABLE subcategories (
+    id INTEGER NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    category_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(category_id) REFERENCES categories (id)
+);
+
+CREATE TABLE subscription_bought_history (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    subscription_type_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id),
+    FOREIGN KEY(subscription_type_id) REFERENCES subscription_types (id)
+);
+
+CREATE TABLE subscription_types (
+    id INTEGER NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    price FLOAT NOT NULL,
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE subscriptions (
+    id INTEGER NOT NULL,
+    start_date DATETIME,
+    end_date DATETIME NOT NULL,
+    user_id INTEGER NOT NULL,
+    subscription_type_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id),
+    FOREIGN KEY(subscription_type_id) REFERENCES subscription_types (id)
+);
+
+CREATE TABLE users (
+    id INTEGER NOT NULL,
+    first_name VARCHAR(50) NOT NULL,
+    last_name VARCHAR(50) NOT NULL,
+    email VARCHAR(50) NOT NULL,
+    password VARCHAR(255),
+    receive_promotions BOOLEAN,
+    apple_id VARCHAR(255),
+    facebook_id VARCHAR(255),
+    google_id VARCHAR(255),
+    is_active BOOLEAN,
+    birth_date DATE,
+    role_id INTEGER NOT NULL,
+    latitude FLOAT,
+    longitude FLOAT,
+    PRIMARY KEY (id),
+    UNIQUE (apple_id),
+    UNIQUE (facebook_id),
+    UNIQUE (google_id),
+    FOREIGN KEY(role_id) REFERENCES roles (id)
+);
+
+CREATE TABLE versions (
+    id INTEGER NOT NULL,
+    version VARCHAR(50) NOT NULL,
+    release_date DATE NOT NULL,
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE work_schedules (
+    id INTEGER NOT NULL,
+    day_of_week VARCHAR(9) NOT NULL,
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    is_active BOOLEAN,
+    professional_service_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(professional_service_id) REFERENCES professional_services (id)
+);
+
+CREATE INDEX ix_categories_id ON categories (id);
+
+CREATE INDEX ix_comments_id ON comments (id);
+
+CREATE INDEX ix_professional_services_id ON professional_services (id);
+
+CREATE INDEX ix_profile_images_id ON profile_images (id);
+
+CREATE INDEX ix_ratings_id ON ratings (id);
+
+CREATE INDEX ix_roles_id ON roles (id);
+
+CREATE INDEX ix_service_images_id ON service_images (id);
+
+CREATE INDEX ix_subcategories_id ON subcategories (id);
+
+CREATE INDEX ix_subscription_bought_history_id ON subscription_bought_history (id);
+
+CREATE INDEX ix_subscription_types_id ON subscription_types (id);
+
+CREATE INDEX ix_subscriptions_id ON subscriptions (id);
+
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+
+CREATE INDEX ix_users_id ON users (id);
+
+CREATE INDEX ix_versions_release_date ON versions (release_date);
+
+CREATE INDEX ix_work_schedules_id ON work_schedules (id);
+
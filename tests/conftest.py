@@ -0,0 +1,109 @@
+import os
+import tempfile
+
+# The app reads its settings at import time, so they are set before anything
+# from the project is imported. Every test session gets its own SQLite file.
+TEST_DIRECTORY = tempfile.mkdtemp(prefix="proserfy-tests-")
+os.environ["URL_DATABASE"] = f"sqlite:///{os.path.join(TEST_DIRECTORY, 'primary.db')}"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("JWT_REFRESH_TOKEN_EXPIRE_DAYS", "7")
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["SCHEDULE_TIMEZONE"] = "America/Santiago"
+os.environ["SEED_LOCK_FILE"] = os.path.join(TEST_DIRECTORY, "seed.lock")
+
+import pytest
+from datetime import date, time
+from fastapi.testclient import TestClient
+import main
+from config.database import SessionLocal
+from models.professional_services import ProfessionalService, WorkSchedule
+from models.service_images import ServiceImage
+from models.users import User
+from utils.jwt_handler import create_access_token
+from utils.leaderboard_handler import rebuild_leaderboards
+from utils.ratings_handler import rebuild_rating_histograms
+
+
+@pytest.fixture
+def anyio_backend():
+    # The app and its background tasks run on asyncio
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def create_user(db, email: str, role_id: int = 2) -> User:
+    user = User(
+        first_name="Test",
+        last_name="User",
+        email=email,
+        birth_date=date(1990, 1, 1),
+        role_id=role_id,
+        is_active=True,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def auth_headers(email: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+
+@pytest.fixture(scope="session")
+def professional():
+    # A professional with 30 services, each with images and a schedule
+    session = SessionLocal()
+    try:
+        user = create_user(session, "professional@example.com")
+        for number in range(30):
+            service = ProfessionalService(
+                name=f"Service {number}",
+                description="Description",
+                city="Santiago",
+                range_from=10 * number,
+                range_to=10 * number + 100,
+                latitude=-33.45 + number * 0.001,
+                longitude=-70.65,
+                average_rating=(number % 10) / 2,
+                subcategory_id=1 + number % 3,
+                professional_id=user.id,
+            )
+            session.add(service)
+            session.flush()
+            session.add_all(
+                [
+                    ServiceImage(
+                        url=f"/img/{service.id}-{i}.png", service_id=service.id
+                    )
+                    for i in range(2)
+                ]
+            )
+            session.add(
+                WorkSchedule(
+                    day_of_week="Monday",
+                    start_time=time(9),
+                    end_time=time(18),
+                    professional_service_id=service.id,
+                )
+            )
+        rebuild_rating_histograms(session)
+        rebuild_leaderboards(session)
+        session.commit()
+        return user.email
+    finally:
+        session.close()
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from utils import availability_handler
+from utils.availability_handler import MINUTES_PER_DAY
+from utils.filters_handler import ServiceFilters
+
+
+def open_minute(open_at=None, open_now=False):
+    return ServiceFilters(
+        q=None,
+        category_id=None,
+        subcategory_id=None,
+        min_rating=None,
+        min_price=None,
+        max_price=None,
+        open_at=open_at,
+        open_now=open_now,
+    ).open_minute
+
+
+def test_naive_open_at_is_schedule_time():
+    # Monday 10:30
+    assert open_minute(datetime(2024, 1, 1, 10, 30)) == 10 * 60 + 30
+
+
+@pytest.mark.parametrize(
+    "open_at",
+    [
+        # Santiago is three hours behind UTC in January
+        datetime(2024, 1, 1, 13, 30, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 8, 30, tzinfo=timezone(timedelta(hours=-5))),
+    ],
+)
+def test_aware_open_at_is_converted_to_schedule_time(open_at):
+    assert open_minute(open_at) == 10 * 60 + 30
+
+
+def test_conversion_can_change_the_day():
+    # Monday 01:00 UTC is still Sunday evening in Santiago
+    open_at = datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc)
+    assert open_minute(open_at) == 6 * MINUTES_PER_DAY + 22 * 60
+
+
+def test_open_now_uses_the_schedule_timezone(monkeypatch):
+    moment = datetime(2024, 1, 1, 13, 30, tzinfo=timezone.utc)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moment.astimezone(tz)
+
+    monkeypatch.setattr(availability_handler, "datetime", FrozenDatetime)
+    assert open_minute(open_now=True) == 10 * 60 + 30
+
+
+def test_no_time_filter():
+    assert open_minute() is None
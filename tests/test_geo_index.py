@@ -0,0 +1,36 @@
+import numpy as np
+from utils.geo_index_handler import GeoIndex
+
+
+def test_upsert_moves_an_existing_service():
+    index = GeoIndex()
+    index.rebuild([(1, -33.45, -70.65), (2, -33.46, -70.65)])
+
+    index.upsert(1, 10.0, 10.0)
+
+    assert len(index) == 2
+    ids, _ = index.within(-33.45, -70.65, 5)
+    assert ids.tolist() == [2]
+    ids, distances = index.within(10.0, 10.0, 1)
+    assert ids.tolist() == [1]
+    assert distances.tolist() == [0.0]
+
+
+def test_readers_during_an_upsert_see_a_whole_snapshot(monkeypatch):
+    index = GeoIndex()
+    index.rebuild((number, -33.45 + number * 1e-4, -70.65) for number in range(50))
+    results = []
+    insert = np.insert
+
+    def insert_then_read(*args, **kwargs):
+        # A request reading the index while the upsert is half way through
+        inserted = insert(*args, **kwargs)
+        results.append(index.within(-33.45, -70.65, 5))
+        return inserted
+
+    monkeypatch.setattr(np, "insert", insert_then_read)
+    index.upsert(50, -33.449, -70.65)
+    monkeypatch.undo()
+
+    assert [len(ids) for ids, _ in results] == [50, 50, 50]
+    assert len(index.within(-33.45, -70.65, 5)[0]) == 51
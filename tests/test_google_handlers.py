@@ -0,0 +1,247 @@
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from urllib.parse import parse_qsl
+import httpx
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from fastapi import HTTPException
+from google.auth import crypt
+from google.auth import jwt as google_jwt
+from utils import google_handlers
+
+CLIENT_ID = "client-id.apps.googleusercontent.com"
+CERTS_URL = "https://certs.test/oauth2/v1/certs"
+TOKEN_URL = "https://token.test/token"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def signing_key(kid: str):
+    # A self-signed certificate, like the ones Google publishes, and a signer
+    # for tokens that it verifies
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return (
+        certificate.public_bytes(serialization.Encoding.PEM).decode(),
+        crypt.RSASigner.from_string(private_pem, key_id=kid),
+    )
+
+
+def id_token(signer, **claims) -> str:
+    issued_at = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "1234",
+        "email": "user@example.com",
+        "iat": issued_at,
+        "exp": issued_at + 3600,
+        **claims,
+    }
+    return google_jwt.encode(signer, payload).decode()
+
+
+class GoogleStub:
+    # Serves the certificates and the token endpoint, and counts the requests
+    def __init__(self):
+        self.certs = {}
+        self.cache_control = "public, max-age=600"
+        self.token_status = 200
+        self.error = None
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.error is not None:
+            raise self.error(self.error.__name__, request=request)
+        if request.url == CERTS_URL:
+            return httpx.Response(
+                200, json=self.certs, headers={"cache-control": self.cache_control}
+            )
+        if request.url == TOKEN_URL:
+            if self.token_status != 200:
+                return httpx.Response(self.token_status, json={"error": "invalid"})
+            return httpx.Response(
+                200, json={"id_token": "token", "form": request.content.decode()}
+            )
+        return httpx.Response(404)
+
+    def certs_requests(self) -> int:
+        return sum(1 for request in self.requests if request.url == CERTS_URL)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(
+        google_handlers, "time", SimpleNamespace(monotonic=clock.monotonic)
+    )
+    return clock
+
+
+@pytest.fixture
+async def google(monkeypatch, clock):
+    stub = GoogleStub()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(stub))
+    monkeypatch.setattr(google_handlers, "_http_client", client)
+    monkeypatch.setattr(google_handlers, "_certs", None)
+    monkeypatch.setattr(google_handlers, "_certs_expire_at", 0.0)
+    monkeypatch.setattr(google_handlers, "_certs_fetched_at", 0.0)
+    monkeypatch.setattr(google_handlers, "GOOGLE_CLIENT_ID", CLIENT_ID)
+    monkeypatch.setattr(google_handlers, "GOOGLE_CERTS_URL", CERTS_URL)
+    monkeypatch.setattr(google_handlers, "GOOGLE_TOKEN_URL", TOKEN_URL)
+    yield stub
+    await client.aclose()
+
+
+@pytest.mark.parametrize(
+    "cache_control, max_age",
+    [
+        ("public, max-age=19732, must-revalidate, no-transform", 19732),
+        ("no-cache", google_handlers.DEFAULT_CERTS_MAX_AGE_SECONDS),
+        (None, google_handlers.DEFAULT_CERTS_MAX_AGE_SECONDS),
+    ],
+)
+def test_cache_max_age(cache_control, max_age):
+    assert google_handlers.cache_max_age(cache_control) == max_age
+
+
+@pytest.mark.anyio
+async def test_certs_are_cached_for_max_age(google, clock):
+    cert, signer = signing_key("key-1")
+    google.certs = {"key-1": cert}
+
+    for _ in range(3):
+        info = await google_handlers.verify_google_id_token(id_token(signer))
+        assert info["email"] == "user@example.com"
+    assert google.certs_requests() == 1
+
+    clock.now += 599
+    await google_handlers.verify_google_id_token(id_token(signer))
+    assert google.certs_requests() == 1
+
+    clock.now += 1
+    await google_handlers.verify_google_id_token(id_token(signer))
+    assert google.certs_requests() == 2
+
+
+@pytest.mark.anyio
+async def test_unknown_kid_forces_refetch(google, clock):
+    old_cert, _ = signing_key("key-1")
+    new_cert, new_signer = signing_key("key-2")
+    google.certs = {"key-1": old_cert}
+    await google_handlers.get_google_certs()
+
+    # Google rotated its keys before the cached copy expired
+    google.certs = {"key-1": old_cert, "key-2": new_cert}
+    clock.now += google_handlers.MIN_CERTS_REFRESH_SECONDS
+
+    info = await google_handlers.verify_google_id_token(id_token(new_signer))
+    assert info["sub"] == "1234"
+    assert google.certs_requests() == 2
+
+
+@pytest.mark.anyio
+async def test_forced_refetches_are_rate_limited(google, clock):
+    cert, _ = signing_key("key-1")
+    _, forged_signer = signing_key("forged")
+    google.certs = {"key-1": cert}
+    await google_handlers.get_google_certs()
+
+    clock.now += 1
+    for _ in range(5):
+        with pytest.raises(HTTPException) as error:
+            await google_handlers.verify_google_id_token(id_token(forged_signer))
+        assert error.value.status_code == 400
+    assert google.certs_requests() == 1
+
+    clock.now += google_handlers.MIN_CERTS_REFRESH_SECONDS
+    with pytest.raises(HTTPException):
+        await google_handlers.verify_google_id_token(id_token(forged_signer))
+    assert google.certs_requests() == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "claims",
+    [
+        {"aud": "someone-else.apps.googleusercontent.com"},
+        {"iss": "https://accounts.example.com"},
+    ],
+)
+async def test_wrong_audience_or_issuer_is_rejected(google, claims):
+    cert, signer = signing_key("key-1")
+    google.certs = {"key-1": cert}
+
+    with pytest.raises(HTTPException) as error:
+        await google_handlers.verify_google_id_token(id_token(signer, **claims))
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid Google token"
+
+
+@pytest.mark.anyio
+async def test_certs_outage_is_unavailable(google):
+    google.error = httpx.ConnectError
+
+    with pytest.raises(HTTPException) as error:
+        await google_handlers.get_google_certs()
+    assert error.value.status_code == 503
+
+
+@pytest.mark.anyio
+async def test_fetch_google_tokens(google, monkeypatch):
+    monkeypatch.setattr(google_handlers, "GOOGLE_CLIENT_SECRET", "secret")
+
+    tokens = await google_handlers.fetch_google_tokens("the-code")
+
+    assert tokens["id_token"] == "token"
+    form = dict(parse_qsl(tokens["form"]))
+    assert form["code"] == "the-code"
+    assert form["client_id"] == CLIENT_ID
+    assert form["grant_type"] == "authorization_code"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("token_status", [400, 401, 500])
+async def test_token_exchange_error_is_bad_request(google, token_status):
+    google.token_status = token_status
+
+    with pytest.raises(HTTPException) as error:
+        await google_handlers.fetch_google_tokens("expired-code")
+    assert error.value.status_code == 400
+    assert error.value.detail == "Error requesting tokens from Google"
+
+
+@pytest.mark.anyio
+async def test_token_exchange_timeout_is_bad_request(google):
+    google.error = httpx.ReadTimeout
+
+    with pytest.raises(HTTPException) as error:
+        await google_handlers.fetch_google_tokens("the-code")
+    assert error.value.status_code == 400
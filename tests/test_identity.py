@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from custom_exceptions.users_exceptions import GenericException
+from models.subscriptions import Subscription
+from tests.conftest import auth_headers, create_user
+from utils.error_handler import generic_error_exception_handler
+from utils.identity_handler import get_current_active_user, get_current_principal
+from utils.principal_cache_handler import (
+    get_principal,
+    invalidate_principal,
+    load_principal,
+)
+from utils.validate_sub_handler import verify_active_subscription
+
+
+def add_subscription(db, user, end_date):
+    db.add(
+        Subscription(
+            user_id=user.id,
+            subscription_type_id=1,
+            start_date=end_date - timedelta(days=365),
+            end_date=end_date,
+        )
+    )
+    db.commit()
+
+
+def test_latest_subscription_decides(db):
+    user = create_user(db, "renewed@example.com")
+    now = datetime.now()
+    # The renewal is stored before the expired row it replaced
+    add_subscription(db, user, now + timedelta(days=30))
+    add_subscription(db, user, now - timedelta(days=30))
+
+    principal = load_principal(db, user.email)
+    assert principal.subscription_end_date > now
+    assert principal.has_active_subscription
+
+
+def test_dependencies_share_one_identity(db):
+    user = create_user(db, "identity@example.com")
+    add_subscription(db, user, datetime.now() + timedelta(days=1))
+    invalidate_principal(user.email)
+
+    app = FastAPI()
+
+    @app.get("/identity")
+    def identity(
+        principal=Depends(get_current_principal),
+        current_user=Depends(get_current_active_user),
+    ):
+        return {
+            "principal": principal.user_id,
+            "user": current_user.id,
+            "active_subscription": principal.has_active_subscription,
+        }
+
+    response = TestClient(app).get("/identity", headers=auth_headers(user.email))
+    assert response.json() == {
+        "principal": user.id,
+        "user": user.id,
+        "active_subscription": True,
+    }
+
+
+def test_suspension_is_read_from_the_user_row(db):
+    user = create_user(db, "suspended@example.com")
+    get_principal(db, user.email)
+    user.is_active = False
+    db.commit()
+
+    app = FastAPI()
+    app.add_exception_handler(GenericException, generic_error_exception_handler)
+
+    @app.get("/me")
+    def me(current_user=Depends(get_current_active_user)):
+        return {"user": current_user.id}
+
+    # The cached principal still says active
+    response = TestClient(app).get("/me", headers=auth_headers(user.email))
+    assert response.status_code == 403
+
+
+def test_subscription_dependency_returns_the_user(db):
+    user = create_user(db, "subscriber@example.com")
+    add_subscription(db, user, datetime.now() - timedelta(days=1))
+    invalidate_principal(user.email)
+
+    app = FastAPI()
+    app.add_exception_handler(GenericException, generic_error_exception_handler)
+
+    @app.get("/premium")
+    def premium(current_user=Depends(verify_active_subscription)):
+        return {"user": current_user.id, "email": current_user.email}
+
+    client = TestClient(app)
+    response = client.get("/premium", headers=auth_headers(user.email))
+    assert response.status_code == 403
+
+    add_subscription(db, user, datetime.now() + timedelta(days=1))
+    invalidate_principal(user.email)
+    response = client.get("/premium", headers=auth_headers(user.email))
+    assert response.json() == {"user": user.id, "email": user.email}
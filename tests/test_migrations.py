@@ -0,0 +1,142 @@
+import os
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import Column, Double, create_engine, event, inspect, text
+from sqlalchemy.dialects import mysql, postgresql
+from config.database import Base, ensure_schema
+from migrations import MIGRATIONS, missing_columns, operations, run_migrations
+from migrations.m0004_hot_path_indexes import remove_duplicate_ratings
+
+BASELINE_SCHEMA = os.path.join(os.path.dirname(__file__), "baseline_schema.sql")
+
+
+@pytest.fixture
+def baseline_connection():
+    # A database created by the app before migrations existed, upgraded the
+    # way init_db upgrades it
+    engine = create_engine("sqlite://")
+    with open(BASELINE_SCHEMA) as schema_file:
+        statements = [
+            statement
+            for statement in schema_file.read().split(";")
+            if "CREATE" in statement
+        ]
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+        ensure_schema(connection)
+        run_migrations(connection)
+        yield connection
+    engine.dispose()
+
+
+def test_baseline_schema_upgrades_to_the_models(baseline_connection):
+    assert missing_columns(baseline_connection) == []
+
+    # An index is in place when the database has one with the same leading
+    # columns, which is all add_index asks for
+    inspector = inspect(baseline_connection)
+    missing_indexes = [
+        index.name
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+        if not any(
+            existing["column_names"][: len(index.columns)]
+            == [column.name for column in index.columns]
+            for existing in inspector.get_indexes(table.name)
+        )
+        # SQLite has no FULLTEXT indexes; the search falls back to tokens
+        and not index.dialect_options["mysql"]["prefix"]
+    ]
+    assert missing_indexes == []
+    applied = baseline_connection.execute(
+        text("SELECT version FROM schema_migrations")
+    ).scalars()
+    assert set(applied) == {migration.VERSION for migration in MIGRATIONS}
+
+
+def test_model_change_without_migration_is_reported(baseline_connection):
+    baseline_connection.execute(
+        text("ALTER TABLE professional_services DROP COLUMN rating_count")
+    )
+    assert missing_columns(baseline_connection) == [
+        "professional_services.rating_count"
+    ]
+
+
+def test_duplicate_ratings_are_removed_in_one_statement():
+    engine = create_engine("sqlite://")
+    statements = []
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE ratings (id INTEGER PRIMARY KEY, user_id INTEGER, "
+                "professional_service_id INTEGER, rating INTEGER)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO ratings (user_id, professional_service_id, rating) "
+                "VALUES (1, 1, 5), (1, 1, 3), (1, 2, 4), (2, 1, 1), (1, 1, 2)"
+            )
+        )
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(connection, "before_cursor_execute", count)
+        assert remove_duplicate_ratings(connection) == 2
+        event.remove(connection, "before_cursor_execute", count)
+        rows = connection.execute(text("SELECT id FROM ratings ORDER BY id")).all()
+
+    # The earliest rating of each user and service is kept
+    assert [row.id for row in rows] == [1, 3, 4]
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize(
+    "dialect, existing_type, current_type, statement",
+    [
+        (
+            mysql.dialect(),
+            mysql.FLOAT(),
+            mysql.DOUBLE(),
+            "ALTER TABLE leaderboard_entries MODIFY COLUMN average_rating "
+            "DOUBLE NOT NULL",
+        ),
+        (
+            postgresql.dialect(),
+            postgresql.REAL(),
+            postgresql.DOUBLE_PRECISION(),
+            "ALTER TABLE leaderboard_entries ALTER COLUMN average_rating "
+            "TYPE DOUBLE PRECISION",
+        ),
+    ],
+)
+def test_alter_column_type(
+    monkeypatch, dialect, existing_type, current_type, statement
+):
+    # No MySQL or Postgres server here: the connection records what it is
+    # asked to run and the inspector reports the given column type
+    executed = []
+    connection = SimpleNamespace(
+        dialect=dialect, execute=lambda clause: executed.append(str(clause))
+    )
+    column_type = existing_type
+
+    def columns(table_name):
+        return [{"name": "average_rating", "type": column_type}]
+
+    monkeypatch.setattr(
+        operations, "inspect", lambda bind: SimpleNamespace(get_columns=columns)
+    )
+    column = Column("average_rating", Double, nullable=False)
+
+    assert operations.alter_column_type(connection, "leaderboard_entries", column)
+    assert executed == [statement]
+
+    column_type = current_type
+    assert not operations.alter_column_type(
+        connection, "leaderboard_entries", Column("average_rating", Double)
+    )
+    assert len(executed) == 1
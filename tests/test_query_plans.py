@@ -0,0 +1,29 @@
+from sqlalchemy import text
+from config.database import engine
+from migrations.check_query_plans import check_query_plans
+
+
+def test_hot_paths_use_indexes(professional):
+    # Runs against the migrated test database, which has services, images and
+    # schedules, so the eager loads are checked too
+    with engine.connect() as connection:
+        with connection.begin() as transaction:
+            failures = check_query_plans(connection)
+            transaction.rollback()
+    assert failures == []
+
+
+def test_missing_keyset_index_is_reported(professional):
+    # A pooled connection answers EXPLAIN from statements it prepared before
+    # the DROP, so the test uses a fresh connection and leaves none behind
+    engine.dispose()
+    with engine.connect() as connection:
+        with connection.begin() as transaction:
+            # SQLite DDL is transactional, so the rollback restores the index
+            connection.execute(
+                text("DROP INDEX ix_professional_services_average_rating_id")
+            )
+            failures = check_query_plans(connection)
+            transaction.rollback()
+    engine.dispose()
+    assert "service listing, next page" in failures
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+import config.database
+import main
+from config.database import PRIMARY_PIN_COOKIE, create_replica_engine, engine
+from models.users import User
+from tests.conftest import TEST_DIRECTORY
+
+REPLICA_PATH = os.path.join(TEST_DIRECTORY, "replica.db")
+REPLICA_URL = f"sqlite:///{REPLICA_PATH}"
+
+
+def roles(client: TestClient) -> set:
+    response = client.get("/v1/roles")
+    assert response.status_code == 200
+    return {role["name"] for role in response.json()}
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    # A second SQLite file stands in for the replica: a copy of the primary
+    # whose roles are renamed, so every read shows which database served it
+    # and writes to the primary never reach it
+    primary_path = engine.url.database
+    with sqlite3.connect(primary_path) as source, sqlite3.connect(
+        REPLICA_PATH
+    ) as target:
+        source.backup(target)
+        target.execute("UPDATE roles SET name = 'replica ' || name")
+
+    replica_engine = create_replica_engine(0, REPLICA_URL)
+    monkeypatch.setattr(
+        config.database,
+        "ReplicaSessionLocals",
+        [
+            async_sessionmaker(
+                bind=replica_engine, autoflush=False, expire_on_commit=False
+            )
+        ],
+    )
+    monkeypatch.setattr(main, "REPLICA_URL_DATABASES", [REPLICA_URL])
+    yield
+    asyncio.run(replica_engine.dispose())
+    os.remove(REPLICA_PATH)
+
+
+def register(client: TestClient, email: str):
+    return client.post(
+        "/v1/register",
+        json={
+            "first_name": "Replica",
+            "last_name": "Test",
+            "email": email,
+            "birth_date": "1990-01-01",
+            "password": "password123",
+            "role_id": 1,
+        },
+    )
+
+
+def test_reads_go_to_the_replica(replica):
+    client = TestClient(main.app)
+    assert roles(client) == {"replica common", "replica professional"}
+
+
+def test_reads_fall_back_to_the_primary_without_replicas():
+    assert config.database.ReplicaSessionLocals == []
+    client = TestClient(main.app)
+    assert roles(client) == {"common", "professional"}
+    response = register(client, "no-replica@example.com")
+    assert response.status_code == 201
+    # Nothing to pin to without replicas
+    assert PRIMARY_PIN_COOKIE not in response.cookies
+
+
+def test_write_pins_the_next_read_to_the_primary(replica, db):
+    client = TestClient(main.app)
+    response = register(client, "pinned@example.com")
+    assert response.status_code == 201
+    assert PRIMARY_PIN_COOKIE in response.cookies
+
+    user_id = db.query(User.id).filter(User.email == "pinned@example.com").scalar()
+    # The client sees its own write although the replica does not have it
+    assert client.get(f"/v1/users/{user_id}").status_code == 200
+    assert roles(client) == {"common", "professional"}
+
+    # A client that has not written keeps reading from the replica
+    assert TestClient(main.app).get(f"/v1/users/{user_id}").status_code == 404
+
+
+def test_failed_write_does_not_pin(replica):
+    client = TestClient(main.app)
+    register(client, "twice@example.com")
+    client.cookies.clear()
+
+    response = register(client, "twice@example.com")
+    assert response.status_code == 400
+    assert PRIMARY_PIN_COOKIE not in response.cookies
+    assert roles(client) == {"replica common", "replica professional"}
@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import event, text
+import config.database
+from config.database import engine, init_db
+from models.roles import Role
+
+
+@pytest.fixture
+def server_lock(monkeypatch):
+    # Stands in for GET_LOCK / pg_advisory_lock on the SQLite test database
+    # and records when they run relative to the seed transaction
+    monkeypatch.setitem(
+        config.database.SEED_SERVER_LOCKS,
+        "sqlite",
+        (text("SELECT 'acquire'"), text("SELECT 'release'")),
+    )
+    events = []
+
+    def statement(conn, cursor, statement, parameters, context, executemany):
+        if "'acquire'" in statement or "'release'" in statement:
+            events.append(statement.split("'")[1])
+        elif "roles" in statement and not events[-1:] == ["seed"]:
+            events.append("seed")
+
+    def commit(conn):
+        events.append("commit")
+
+    event.listen(engine, "before_cursor_execute", statement)
+    event.listen(engine, "commit", commit)
+    yield events
+    event.remove(engine, "before_cursor_execute", statement)
+    event.remove(engine, "commit", commit)
+
+
+def test_seed_is_committed_before_the_lock_is_released(server_lock):
+    init_db()
+
+    assert server_lock == [
+        "acquire",
+        "commit",
+        "seed",
+        "commit",
+        "release",
+        "commit",
+    ]
+
+
+def test_lock_is_released_when_seeding_fails(server_lock, monkeypatch):
+    def fail(connection):
+        raise RuntimeError("seed failed")
+
+    monkeypatch.setattr(config.database, "seed_defaults", fail)
+    with pytest.raises(RuntimeError):
+        init_db()
+
+    assert server_lock[0] == "acquire"
+    assert server_lock[-2:] == ["release", "commit"]
+
+
+def test_seeding_again_adds_nothing(db):
+    roles = db.query(Role.name).count()
+    init_db()
+    assert db.query(Role.name).count() == roles
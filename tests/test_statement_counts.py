@@ -0,0 +1,151 @@
+import pytest
+from sqlalchemy import event
+from config.database import async_engine, engine
+from tests.conftest import auth_headers, create_user
+from utils.count_cache_handler import _count_cache
+
+# Every endpoint below must issue a fixed number of statements, however many
+# rows it returns. An N+1 regression shows up as a count that grows with the
+# page size.
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engines = [engine, async_engine.sync_engine]
+    for target in engines:
+        event.listen(target, "before_cursor_execute", count)
+    _count_cache.clear()
+    try:
+        yield executed
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", count)
+
+
+def statements_for(client, statements, method, url, **kwargs):
+    statements.clear()
+    response = client.request(method, url, **kwargs)
+    assert response.status_code < 300, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize("limit", [1, 5, 20])
+def test_listing_statements_do_not_grow_with_page_size(
+    client, professional, statements, limit
+):
+    # count, page, images, work schedules
+    count = statements_for(
+        client, statements, "GET", "/v1/professional-services", params={"limit": limit}
+    )
+    assert count <= 4
+
+
+@pytest.mark.parametrize("limit", [1, 5, 20])
+def test_cursor_page_statements_do_not_grow_with_page_size(
+    client, professional, statements, limit
+):
+    first = client.get(
+        "/v1/professional-services", params={"limit": 5, "include_total": False}
+    ).json()
+    count = statements_for(
+        client,
+        statements,
+        "GET",
+        "/v1/professional-services",
+        params={"limit": limit, "cursor": first["next_cursor"]},
+    )
+    assert count <= 4
+
+
+@pytest.mark.parametrize("limit", [1, 5, 20])
+def test_filter_statements_do_not_grow_with_page_size(
+    client, professional, statements, limit
+):
+    count = statements_for(
+        client,
+        statements,
+        "GET",
+        "/v1/professional-services/filter",
+        params={
+            "lat": -33.45,
+            "lon": -70.65,
+            "range_km": 50,
+            "limit": limit,
+            "subcategory_id": 1,
+            "min_price": 50,
+        },
+    )
+    assert count <= 4
+
+
+@pytest.mark.parametrize("days", [1, 5])
+def test_service_create_statements(client, professional, statements, days):
+    service = {
+        "name": "Guitar lessons",
+        "description": "Description",
+        "city": "Santiago",
+        "range_from": 10,
+        "range_to": 100,
+        "latitude": -33.4,
+        "longitude": -70.6,
+        "subcategory_id": 1,
+        "work_schedules": [
+            {
+                "day_of_week": day,
+                "start_time": "09:00:00",
+                "end_time": "18:00:00",
+                "is_active": True,
+            }
+            for day in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")[:days]
+        ],
+    }
+    count = statements_for(
+        client,
+        statements,
+        "POST",
+        "/v1/professional-services",
+        json=service,
+        headers=auth_headers(professional),
+    )
+    assert count <= 18
+
+
+def test_comment_statements(client, db, professional, statements):
+    email = "commenter@example.com"
+    create_user(db, email, role_id=1)
+    # The first request also looks up the principal, the second finds it cached
+    for slim, bound in ((False, 7), (True, 3)):
+        count = statements_for(
+            client,
+            statements,
+            "POST",
+            "/v1/comments",
+            params={"slim": slim},
+            json={
+                "text": "Great",
+                "rating": 5,
+                "professional_service_id": 1,
+                "user_id": 0,
+            },
+            headers=auth_headers(email),
+        )
+        assert count <= bound
+
+
+def test_rating_statements(client, db, professional, statements):
+    email = "rater@example.com"
+    create_user(db, email, role_id=1)
+    count = statements_for(
+        client,
+        statements,
+        "POST",
+        "/v1/ratings",
+        json={"rating": 4, "professional_service_id": 2, "user_id": 0},
+        headers=auth_headers(email),
+    )
+    assert count <= 10
@@ -0,0 +1,93 @@
+import json
+import os
+import pytest
+from models.comments import Comment
+from tests.conftest import TEST_DIRECTORY, create_user
+from utils import write_behind_handler
+from utils.write_behind_handler import (
+    COMMENT,
+    WriteBehindBuffer,
+    replay_dead_letters,
+)
+
+DEAD_LETTER_FILE = os.path.join(TEST_DIRECTORY, "dead-letter.jsonl")
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    monkeypatch.setattr(write_behind_handler, "WRITE_BEHIND_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(
+        write_behind_handler, "WRITE_BEHIND_DEAD_LETTER_FILE", DEAD_LETTER_FILE
+    )
+    yield WriteBehindBuffer(max_size=10, batch_size=10, flush_seconds=0)
+    if os.path.exists(DEAD_LETTER_FILE):
+        os.remove(DEAD_LETTER_FILE)
+
+
+@pytest.fixture
+def commenter(db, professional, request):
+    return create_user(db, f"{request.node.name}@example.com", role_id=1).id
+
+
+def comment(user_id, text):
+    return (
+        COMMENT,
+        {"text": text, "rating": 5, "user_id": user_id, "professional_service_id": 3},
+    )
+
+
+def stored_texts(db, user_id):
+    return {text for (text,) in db.query(Comment.text).filter_by(user_id=user_id)}
+
+
+@pytest.mark.anyio
+async def test_transient_failure_is_retried(buffer, commenter, db, monkeypatch):
+    flush = write_behind_handler._flush
+    calls = []
+
+    def flaky_flush(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("database restarting")
+        flush(batch)
+
+    monkeypatch.setattr(write_behind_handler, "_flush", flaky_flush)
+    await buffer._flush_batch(
+        [comment(commenter, "first"), comment(commenter, "second")]
+    )
+
+    assert calls == [2, 2]
+    assert stored_texts(db, commenter) == {"first", "second"}
+    assert buffer.stats()["retries"] == 1
+    assert buffer.stats()["dead_lettered"] == 0
+    assert not os.path.exists(DEAD_LETTER_FILE)
+
+
+@pytest.mark.anyio
+async def test_failed_items_go_to_the_dead_letter_file(buffer, commenter, db):
+    bad = comment(commenter, None)
+    await buffer._flush_batch([comment(commenter, "kept"), bad])
+
+    assert stored_texts(db, commenter) == {"kept"}
+    assert buffer.stats() == {
+        "queued": 0,
+        "flushed": 1,
+        "retries": 2,
+        "dead_lettered": 1,
+    }
+    with open(DEAD_LETTER_FILE) as dead_letter_file:
+        assert [json.loads(line) for line in dead_letter_file] == [
+            {"kind": bad[0], "values": bad[1]}
+        ]
+
+
+def test_replay_writes_dead_letters_and_keeps_failures(buffer, commenter, db):
+    write_behind_handler.dead_letter(
+        [comment(commenter, "replayed"), comment(commenter, None)]
+    )
+
+    assert replay_dead_letters() == (1, 1)
+    assert stored_texts(db, commenter) == {"replayed"}
+    with open(DEAD_LETTER_FILE) as dead_letter_file:
+        assert len(dead_letter_file.readlines()) == 1
+    assert replay_dead_letters() == (0, 1)
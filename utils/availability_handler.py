@@ -0,0 +1,128 @@
+import os
+from datetime import datetime, time
+from typing import Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from models.professional_services import ServiceAvailability, WorkSchedule
+from utils.search_handler import fold_text
+
+load_dotenv()
+
+# Work schedules are wall-clock times in this zone, whatever the server's is
+SCHEDULE_TIMEZONE = ZoneInfo(os.getenv("SCHEDULE_TIMEZONE") or "America/Santiago")
+
+MINUTES_PER_DAY = 24 * 60
+
+DAY_NUMBERS = {
+    "monday": 0,
+    "lunes": 0,
+    "tuesday": 1,
+    "martes": 1,
+    "wednesday": 2,
+    "miercoles": 2,
+    "thursday": 3,
+    "jueves": 3,
+    "friday": 4,
+    "viernes": 4,
+    "saturday": 5,
+    "sabado": 5,
+    "sunday": 6,
+    "domingo": 6,
+}
+
+
+def schedule_time(moment: Optional[datetime] = None) -> datetime:
+    # Now, or the given moment, on the schedules' clock. Naive moments are
+    # taken to be on that clock already.
+    if moment is None:
+        return datetime.now(SCHEDULE_TIMEZONE)
+    if moment.tzinfo is not None:
+        return moment.astimezone(SCHEDULE_TIMEZONE)
+    return moment
+
+
+def minute_of_week(moment: datetime) -> int:
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def availability_intervals(schedules: Iterable) -> List[Tuple[int, int]]:
+    intervals = []
+    for schedule in schedules:
+        day = DAY_NUMBERS.get(fold_text(schedule.day_of_week).strip())
+        if day is None or schedule.is_active is False:
+            continue
+        offset = day * MINUTES_PER_DAY
+        intervals.append(
+            (
+                offset + _minute_of_day(schedule.start_time),
+                offset + _minute_of_day(schedule.end_time),
+            )
+        )
+
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def index_service_availability(db: Session, service_id: int, schedules: Iterable):
+    db.execute(
+        delete(ServiceAvailability).where(
+            ServiceAvailability.professional_service_id == service_id
+        )
+    )
+    intervals = availability_intervals(schedules)
+    if intervals:
+        db.execute(
+            insert(ServiceAvailability),
+            [
+                {
+                    "professional_service_id": service_id,
+                    "start_minute": start,
+                    "end_minute": end,
+                }
+                for start, end in intervals
+            ],
+        )
+
+
+def rebuild_availability_index(db: Session):
+    schedules_by_service = {}
+    for schedule in db.query(WorkSchedule).all():
+        schedules_by_service.setdefault(schedule.professional_service_id, []).append(
+            schedule
+        )
+
+    db.execute(delete(ServiceAvailability))
+    for service_id, schedules in schedules_by_service.items():
+        index_service_availability(db, service_id, schedules)
+    db.commit()
+
+
+def services_open_at(minute: int):
+    # Schedules never cross midnight, so no interval is longer than a day and
+    # only intervals starting within the previous 24h can contain `minute`.
+    return select(ServiceAvailability.professional_service_id).where(
+        ServiceAvailability.start_minute > minute - MINUTES_PER_DAY,
+        ServiceAvailability.start_minute <= minute,
+        ServiceAvailability.end_minute > minute,
+    )
+
+
+if __name__ == "__main__":
+    from config.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        rebuild_availability_index(session)
+    finally:
+        session.close()
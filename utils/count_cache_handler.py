@@ -0,0 +1,39 @@
+import os
+import threading
+from typing import Callable, Hashable
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+COUNT_CACHE_TTL_SECONDS = int(os.getenv("COUNT_CACHE_TTL_SECONDS", 30))
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", 2048))
+
+_count_cache = TTLCache(maxsize=COUNT_CACHE_MAX_ENTRIES, ttl=COUNT_CACHE_TTL_SECONDS)
+_count_cache_lock = threading.Lock()
+
+
+def listing_count_key(**filters) -> Hashable:
+    return ("listing", tuple(sorted(filters.items())))
+
+
+def geo_count_key(lat: float, lon: float, range_km: float, **filters) -> Hashable:
+    # Nearby origins (~100 m cells) share one total; totals are only advisory
+    # and expire after a few seconds anyway.
+    return (
+        "geo",
+        round(lat, 3),
+        round(lon, 3),
+        round(range_km, 1),
+        tuple(sorted(filters.items())),
+    )
+
+
+def cached_count(key: Hashable, count: Callable[[], int]) -> int:
+    with _count_cache_lock:
+        total = _count_cache.get(key)
+    if total is None:
+        total = count()
+        with _count_cache_lock:
+            _count_cache[key] = total
+    return total
@@ -8,6 +8,7 @@ async def generic_error_exception_handler(request: Request, exc: GenericExceptio
     return JSONResponse(
         status_code=exc.code,
         content={"error": f"{exc.message}"},
+        headers=exc.headers,
     )
 
 
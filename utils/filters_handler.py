@@ -0,0 +1,104 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import Query
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models.professional_services import ProfessionalService
+from models.subcategories import SubCategory
+from schemas.paginated_schema import SubCategoryFacet
+from utils.availability_handler import (
+    minute_of_week,
+    schedule_time,
+    services_open_at,
+)
+from utils.search_handler import filter_by_text, normalize_query
+
+
+class ServiceFilters:
+    def __init__(
+        self,
+        q: Optional[str] = Query(None, max_length=100),
+        category_id: Optional[int] = Query(None),
+        subcategory_id: Optional[int] = Query(None),
+        min_rating: Optional[float] = Query(None, ge=0, le=5),
+        min_price: Optional[int] = Query(None, ge=0),
+        max_price: Optional[int] = Query(None, ge=0),
+        open_at: Optional[datetime] = Query(None),
+        open_now: bool = Query(False),
+    ):
+        self.q = q
+        self.category_id = category_id
+        self.subcategory_id = subcategory_id
+        self.min_rating = min_rating
+        self.min_price = min_price
+        self.max_price = max_price
+        if open_now:
+            open_at = schedule_time()
+        elif open_at is not None:
+            open_at = schedule_time(open_at)
+        self.open_minute = minute_of_week(open_at) if open_at else None
+
+    @property
+    def active(self) -> bool:
+        return any(value is not None for value in self.cache_key_items().values())
+
+    def cache_key_items(self) -> dict:
+        return {
+            "q": normalize_query(self.q) if self.q else None,
+            "category_id": self.category_id,
+            "subcategory_id": self.subcategory_id,
+            "min_rating": self.min_rating,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            "open_minute": self.open_minute,
+        }
+
+    def apply(self, db: Session, query, with_subcategory: bool = True):
+        # Facets are counted without the subcategory filter so clients can see
+        # every subcategory they could switch to.
+        if self.q:
+            query = filter_by_text(db, query, self.q)
+        if self.category_id is not None:
+            query = query.filter(
+                ProfessionalService.subcategory_id.in_(
+                    select(SubCategory.id).where(
+                        SubCategory.category_id == self.category_id
+                    )
+                )
+            )
+        if self.min_rating is not None:
+            query = query.filter(ProfessionalService.average_rating >= self.min_rating)
+        # A service matches when its price range overlaps the requested one
+        if self.min_price is not None:
+            query = query.filter(ProfessionalService.range_to >= self.min_price)
+        if self.max_price is not None:
+            query = query.filter(ProfessionalService.range_from <= self.max_price)
+        if self.open_minute is not None:
+            query = query.filter(
+                ProfessionalService.id.in_(services_open_at(self.open_minute))
+            )
+        if with_subcategory:
+            query = self.apply_subcategory(query)
+        return query
+
+    def apply_subcategory(self, query):
+        if self.subcategory_id is not None:
+            query = query.filter(
+                ProfessionalService.subcategory_id == self.subcategory_id
+            )
+        return query
+
+
+def subcategory_facets(query):
+    rows = (
+        query.with_entities(
+            ProfessionalService.subcategory_id, func.count(ProfessionalService.id)
+        )
+        .group_by(ProfessionalService.subcategory_id)
+        .order_by(ProfessionalService.subcategory_id)
+        .all()
+    )
+    return [
+        SubCategoryFacet(subcategory_id=subcategory_id, count=count)
+        for subcategory_id, count in rows
+    ]
@@ -1,21 +1,52 @@
+from typing import Optional
 from fastapi import Request
 
 
-def build_pagination_urls(request: Request, offset: int, limit: int, total: int):
-    current_page_url = str(request.url.replace_query_params(offset=offset, limit=limit))
+def build_pagination_urls(
+    request: Request,
+    offset: int,
+    limit: int,
+    total: Optional[int],
+    cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None,
+    has_next: Optional[bool] = None,
+):
+    if cursor is not None:
+        return build_cursor_urls(request, cursor, next_cursor, limit)
+
+    url = request.url.remove_query_params("cursor")
+    current_page_url = str(url.include_query_params(offset=offset, limit=limit))
 
     next_offset = offset + limit
     prev_offset = offset - limit
+    if has_next is None:
+        has_next = next_offset < total
 
     next_page_url = (
-        str(request.url.replace_query_params(offset=next_offset, limit=limit))
-        if next_offset < total
+        str(url.include_query_params(offset=next_offset, limit=limit))
+        if has_next
         else None
     )
     prev_page_url = (
-        str(request.url.replace_query_params(offset=prev_offset, limit=limit))
+        str(url.include_query_params(offset=prev_offset, limit=limit))
         if prev_offset >= 0
         else None
     )
 
     return current_page_url, next_page_url, prev_page_url
+
+
+def build_cursor_urls(
+    request: Request, cursor: str, next_cursor: Optional[str], limit: int
+):
+    url = request.url.remove_query_params("offset")
+    current_page_url = str(url.include_query_params(cursor=cursor, limit=limit))
+
+    next_page_url = (
+        str(url.include_query_params(cursor=next_cursor, limit=limit))
+        if next_cursor
+        else None
+    )
+
+    # Keyset pages can only be walked forward
+    return current_page_url, next_page_url, None
@@ -0,0 +1,120 @@
+import math
+from typing import Tuple
+import numpy as np
+from sqlalchemy import func
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(math.radians(lat1))
+        * math.cos(math.radians(lat2))
+        * math.sin(d_lon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_km_array(lats: np.ndarray, lons: np.ndarray, lat: float, lon: float):
+    lats = np.radians(lats)
+    d_lat = lats - math.radians(lat)
+    d_lon = np.radians(lons) - math.radians(lon)
+    a = (
+        np.sin(d_lat / 2) ** 2
+        + math.cos(math.radians(lat)) * np.cos(lats) * np.sin(d_lon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+
+
+def bounding_box(
+    lat: float, lon: float, range_km: float
+) -> Tuple[float, float, float, float]:
+    angular_range = range_km / EARTH_RADIUS_KM
+    lat_delta = math.degrees(angular_range)
+    min_lat = lat - lat_delta
+    max_lat = lat + lat_delta
+
+    # Near the poles or across the antimeridian every longitude can be in range
+    if min_lat <= -90 or max_lat >= 90 or angular_range >= math.pi / 2:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+
+    lon_delta = math.degrees(
+        math.asin(min(1.0, math.sin(angular_range) / math.cos(math.radians(lat))))
+    )
+    min_lon = lon - lon_delta
+    max_lon = lon + lon_delta
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, -180.0, 180.0
+
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def distance_km_expression(
+    dialect_name: str, lat_column, lon_column, lat: float, lon: float
+):
+    if dialect_name == "mysql":
+        return (
+            func.ST_Distance_Sphere(
+                func.point(lon_column, lat_column), func.point(lon, lat)
+            )
+            / 1000
+        )
+
+    if dialect_name == "sqlite":
+        # Registered on every SQLite connection by config.database
+        return func.haversine_km(lat_column, lon_column, lat, lon)
+
+    d_lat = func.radians(lat_column - lat)
+    d_lon = func.radians(lon_column - lon)
+    a = func.power(func.sin(d_lat * 0.5), 2) + func.cos(func.radians(lat)) * func.cos(
+        func.radians(lat_column)
+    ) * func.power(func.sin(d_lon * 0.5), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))
+
+
+def filter_bounding_box(query, lat_column, lon_column, lat, lon, range_km):
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, range_km)
+    return query.filter(
+        lat_column.between(min_lat, max_lat),
+        lon_column.between(min_lon, max_lon),
+    )
+
+
+def filter_within_range(
+    query, dialect_name: str, lat_column, lon_column, lat, lon, range_km
+):
+    # The bounding box is served by the (latitude, longitude) index and cuts the
+    # candidates before the exact great-circle distance is evaluated.
+    query = filter_bounding_box(query, lat_column, lon_column, lat, lon, range_km)
+    distance = distance_km_expression(dialect_name, lat_column, lon_column, lat, lon)
+    return query.filter(distance <= range_km)
+
+
+def select_nearest(
+    ids: np.ndarray, distances: np.ndarray, count: int, after: Tuple = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Returns the `count` closest points ordered by (distance, id), skipping
+    # everything up to and including `after`. Only the points at or below the
+    # count-th distance are fully sorted.
+    if after is not None:
+        after_distance, after_id = after
+        keep = (distances > after_distance) | (
+            (distances == after_distance) & (ids > after_id)
+        )
+        ids, distances = ids[keep], distances[keep]
+
+    if count <= 0:
+        return ids[:0], distances[:0]
+
+    if len(ids) > count:
+        threshold = np.partition(distances, count - 1)[count - 1]
+        keep = distances <= threshold
+        ids, distances = ids[keep], distances[keep]
+
+    order = np.lexsort((ids, distances))[:count]
+    return ids[order], distances[order]
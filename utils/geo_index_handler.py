@@ -0,0 +1,130 @@
+import asyncio
+import os
+import threading
+from typing import Iterable, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from fastapi.logger import logger
+from starlette.concurrency import run_in_threadpool
+from config.database import SessionLocal
+from models.professional_services import ProfessionalService
+from utils.geo_handler import bounding_box, filter_bounding_box, haversine_km_array
+
+load_dotenv()
+
+GEO_INDEX_ENABLED = os.getenv("GEO_INDEX_ENABLED", "false").lower() == "true"
+GEO_INDEX_REFRESH_SECONDS = int(os.getenv("GEO_INDEX_REFRESH_SECONDS", 300))
+
+
+class GeoIndex:
+    # Coordinates are kept sorted by latitude so a radius query only computes
+    # distances for the latitude band of its bounding box. The (ids, lats,
+    # lons) arrays are published together as one tuple: writers build new
+    # arrays under the lock and swap the tuple in with a single assignment,
+    # readers take the tuple once and work on that snapshot.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._arrays = self._sorted(
+            np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        )
+
+    def __len__(self):
+        return len(self._arrays[0])
+
+    @staticmethod
+    def _sorted(ids, lats, lons):
+        order = np.argsort(lats, kind="stable")
+        return ids[order], lats[order], lons[order]
+
+    def rebuild(self, rows: Iterable[Tuple[int, float, float]]):
+        rows = list(rows)
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        lats = np.fromiter((row[1] for row in rows), dtype=float, count=len(rows))
+        lons = np.fromiter((row[2] for row in rows), dtype=float, count=len(rows))
+        arrays = self._sorted(ids, lats, lons)
+        with self._lock:
+            self._arrays = arrays
+
+    def upsert(self, service_id: int, lat: float, lon: float):
+        with self._lock:
+            ids, lats, lons = self._arrays
+            keep = ids != service_id
+            ids, lats, lons = ids[keep], lats[keep], lons[keep]
+            position = np.searchsorted(lats, lat)
+            self._arrays = (
+                np.insert(ids, position, service_id),
+                np.insert(lats, position, lat),
+                np.insert(lons, position, lon),
+            )
+
+    def within(
+        self, lat: float, lon: float, range_km: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        ids, lats, lons = self._arrays
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, range_km)
+
+        start = np.searchsorted(lats, min_lat, side="left")
+        end = np.searchsorted(lats, max_lat, side="right")
+        ids, lats, lons = ids[start:end], lats[start:end], lons[start:end]
+
+        in_box = (lons >= min_lon) & (lons <= max_lon)
+        ids, lats, lons = ids[in_box], lats[in_box], lons[in_box]
+
+        distances = haversine_km_array(lats, lons, lat, lon)
+        in_range = distances <= range_km
+        return ids[in_range], distances[in_range]
+
+
+geo_index = GeoIndex()
+
+
+def rebuild_geo_index():
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            ProfessionalService.id,
+            ProfessionalService.latitude,
+            ProfessionalService.longitude,
+        ).all()
+    finally:
+        db.close()
+    geo_index.rebuild(rows)
+
+
+async def refresh_geo_index_periodically():
+    # Services created by other workers show up after the next bulk rebuild
+    while True:
+        await asyncio.sleep(GEO_INDEX_REFRESH_SECONDS)
+        try:
+            await run_in_threadpool(rebuild_geo_index)
+        except Exception as exc:
+            # Keeps serving the previous snapshot until a rebuild succeeds
+            logger.error(f"Rebuilding the geo index failed: {exc}")
+
+
+def services_within_range(
+    db, lat: float, lon: float, range_km: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    if GEO_INDEX_ENABLED:
+        return geo_index.within(lat, lon, range_km)
+
+    rows = filter_bounding_box(
+        db.query(
+            ProfessionalService.id,
+            ProfessionalService.latitude,
+            ProfessionalService.longitude,
+        ),
+        ProfessionalService.latitude,
+        ProfessionalService.longitude,
+        lat,
+        lon,
+        range_km,
+    ).all()
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    lats = np.fromiter((row[1] for row in rows), dtype=float, count=len(rows))
+    lons = np.fromiter((row[2] for row in rows), dtype=float, count=len(rows))
+
+    distances = haversine_km_array(lats, lons, lat, lon)
+    in_range = distances <= range_km
+    return ids[in_range], distances[in_range]
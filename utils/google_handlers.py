@@ -1,17 +1,51 @@
-from typing import Dict
-from fastapi import HTTPException, logger, status
+import asyncio
+import re
+import time
+from typing import Dict, Optional
+import httpx
+from fastapi import HTTPException, status
+from fastapi.logger import logger
 from config.social import (
     GOOGLE_AUTH_ENDPOINT,
+    GOOGLE_CERTS_URL,
     GOOGLE_CLIENT_ID,
     GOOGLE_CLIENT_SECRET,
+    GOOGLE_HTTP_TIMEOUT_SECONDS,
     GOOGLE_REDIRECT_URL,
     GOOGLE_RESPONSE_TYPE,
     GOOGLE_SCOPE,
     GOOGLE_TOKEN_URL,
 )
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-import requests
+from google.auth import jwt as google_jwt
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+DEFAULT_CERTS_MAX_AGE_SECONDS = 300
+# Bounds how often unknown or forged tokens can force a refetch
+MIN_CERTS_REFRESH_SECONDS = 60
+
+_http_client: Optional[httpx.AsyncClient] = None
+_certs: Optional[Dict[str, str]] = None
+_certs_expire_at = 0.0
+_certs_fetched_at = 0.0
+_certs_lock = asyncio.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    # One pooled client per worker, reused across requests
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GOOGLE_HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 def get_google_auth_url() -> str:
@@ -23,7 +57,7 @@ def get_google_auth_url() -> str:
     )
 
 
-def fetch_google_tokens(code: str) -> Dict:
+async def fetch_google_tokens(code: str) -> Dict:
     token_data = {
         "code": code,
         "client_id": GOOGLE_CLIENT_ID,
@@ -32,10 +66,10 @@ def fetch_google_tokens(code: str) -> Dict:
         "grant_type": "authorization_code",
     }
     try:
-        token_response = requests.post(GOOGLE_TOKEN_URL, data=token_data)
+        token_response = await get_http_client().post(GOOGLE_TOKEN_URL, data=token_data)
         token_response.raise_for_status()
         return token_response.json()
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error requesting tokens: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -43,11 +77,51 @@ def fetch_google_tokens(code: str) -> Dict:
         )
 
 
-def verify_google_id_token(id_token_str: str) -> Dict:
+def cache_max_age(cache_control: Optional[str]) -> int:
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return int(match.group(1)) if match else DEFAULT_CERTS_MAX_AGE_SECONDS
+
+
+async def get_google_certs(force_refresh: bool = False) -> Dict[str, str]:
+    global _certs, _certs_expire_at, _certs_fetched_at
+    async with _certs_lock:
+        now = time.monotonic()
+        if force_refresh and now - _certs_fetched_at < MIN_CERTS_REFRESH_SECONDS:
+            force_refresh = False
+        if force_refresh or _certs is None or now >= _certs_expire_at:
+            try:
+                certs_response = await get_http_client().get(GOOGLE_CERTS_URL)
+                certs_response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.error(f"Error requesting Google certificates: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Error requesting certificates from Google",
+                )
+            _certs = certs_response.json()
+            _certs_fetched_at = now
+            _certs_expire_at = now + cache_max_age(
+                certs_response.headers.get("cache-control")
+            )
+        return _certs
+
+
+def _decode_id_token(id_token_str: str, certs: Dict[str, str]) -> Dict:
+    id_info = google_jwt.decode(id_token_str, certs=certs, audience=GOOGLE_CLIENT_ID)
+    if id_info.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer {id_info.get('iss')}")
+    return id_info
+
+
+async def verify_google_id_token(id_token_str: str) -> Dict:
     try:
-        return id_token.verify_oauth2_token(
-            id_token_str, google_requests.Request(), GOOGLE_CLIENT_ID
-        )
+        try:
+            return _decode_id_token(id_token_str, await get_google_certs())
+        except ValueError:
+            # Google may have rotated its keys before our copy expired
+            return _decode_id_token(
+                id_token_str, await get_google_certs(force_refresh=True)
+            )
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Google token"
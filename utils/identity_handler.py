@@ -0,0 +1,58 @@
+from fastapi import Depends, status
+from config.database import db_dependency
+from custom_exceptions.users_exceptions import GenericException
+from models.users import User
+from utils.getters_handler import get_current_user
+from utils.loaders_handler import user_load_options
+from utils.principal_cache_handler import Principal, get_principal
+
+# Every auth dependency builds on get_current_identity, which resolves who is
+# calling from the principal cache. FastAPI resolves a dependency once per
+# request and reuses the value for every dependant, so the principal is looked
+# up at most once per request no matter how many dependencies ask. Handlers
+# that only need who is calling depend on get_current_principal; handlers
+# that read or change the user depend on get_current_active_user, which loads
+# the user itself.
+
+
+def get_current_identity(
+    db: db_dependency, current_user: str = Depends(get_current_user)
+) -> Principal:
+    principal = get_principal(db, current_user)
+    if not principal:
+        raise GenericException(
+            message="User not exists", code=status.HTTP_404_NOT_FOUND
+        )
+    return principal
+
+
+def get_current_principal(
+    principal: Principal = Depends(get_current_identity),
+) -> Principal:
+    if not principal.is_active:
+        raise GenericException(
+            message="User is suspended", code=status.HTTP_403_FORBIDDEN
+        )
+    return principal
+
+
+def get_current_active_user(
+    db: db_dependency, principal: Principal = Depends(get_current_identity)
+) -> User:
+    # User, role, subscription and profile image in one joined SELECT. The
+    # suspension check reads the fresh row, not the cached principal.
+    user = (
+        db.query(User)
+        .options(*user_load_options())
+        .filter(User.id == principal.user_id)
+        .first()
+    )
+    if not user:
+        raise GenericException(
+            message="User not exists", code=status.HTTP_404_NOT_FOUND
+        )
+    if not user.is_active:
+        raise GenericException(
+            message="User is suspended", code=status.HTTP_403_FORBIDDEN
+        )
+    return user
@@ -3,8 +3,10 @@ from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import os
+import uuid
 
 from custom_exceptions.users_exceptions import GenericException
+from utils.revocation_handler import is_token_revoked
 
 load_dotenv()
 
@@ -17,7 +19,7 @@ REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("JWT_REFRESH_TOKEN_EXPIRE_DAYS"))
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -25,7 +27,7 @@ def create_access_token(data: dict):
 def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -37,6 +39,10 @@ def verify_token(token: str, token_type: str):
             raise GenericException(
                 message="Invalid token type", code=status.HTTP_401_UNAUTHORIZED
             )
+        if is_token_revoked(payload.get("jti")):
+            raise GenericException(
+                message="Token has been revoked", code=status.HTTP_401_UNAUTHORIZED
+            )
         return payload
     except JWTError:
         raise GenericException(
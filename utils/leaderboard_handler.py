@@ -0,0 +1,89 @@
+from typing import List
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+from models.leaderboards import LeaderboardEntry
+from models.professional_services import ProfessionalService
+from utils.search_handler import fold_text
+
+
+def city_key(city: str) -> str:
+    return " ".join(fold_text(city).split())[:100]
+
+
+def add_to_leaderboard(db: Session, service: ProfessionalService):
+    db.add(
+        LeaderboardEntry(
+            professional_service_id=service.id,
+            city_key=city_key(service.city),
+            subcategory_id=service.subcategory_id,
+            average_rating=service.average_rating or 0.0,
+            rating_count=service.rating_count or 0,
+        )
+    )
+
+
+def record_rating(db: Session, service_id: int):
+    # Copies the aggregates the rating UPDATE just wrote on the service row
+    average_rating = (
+        select(ProfessionalService.average_rating)
+        .where(ProfessionalService.id == service_id)
+        .scalar_subquery()
+    )
+    rating_count = (
+        select(ProfessionalService.rating_count)
+        .where(ProfessionalService.id == service_id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(LeaderboardEntry)
+        .where(LeaderboardEntry.professional_service_id == service_id)
+        .values(average_rating=average_rating, rating_count=rating_count)
+    )
+
+
+def top_rated_service_ids(
+    db: Session, city: str, subcategory_id: int, limit: int
+) -> List[int]:
+    # Served straight from the ranking index, only `limit` entries are read
+    rows = (
+        db.query(LeaderboardEntry.professional_service_id)
+        .filter(
+            LeaderboardEntry.city_key == city_key(city),
+            LeaderboardEntry.subcategory_id == subcategory_id,
+        )
+        .order_by(
+            LeaderboardEntry.average_rating.desc(),
+            LeaderboardEntry.rating_count.desc(),
+            LeaderboardEntry.professional_service_id.desc(),
+        )
+        .limit(limit)
+        .all()
+    )
+    return [row[0] for row in rows]
+
+
+def rebuild_leaderboards(db: Session):
+    db.execute(delete(LeaderboardEntry))
+    entries = [
+        {
+            "professional_service_id": service.id,
+            "city_key": city_key(service.city),
+            "subcategory_id": service.subcategory_id,
+            "average_rating": service.average_rating or 0.0,
+            "rating_count": service.rating_count,
+        }
+        for service in db.query(ProfessionalService).all()
+    ]
+    if entries:
+        db.execute(insert(LeaderboardEntry), entries)
+    db.commit()
+
+
+if __name__ == "__main__":
+    from config.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        rebuild_leaderboards(session)
+    finally:
+        session.close()
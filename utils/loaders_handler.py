@@ -0,0 +1,43 @@
+from sqlalchemy.orm import joinedload, selectinload
+from models.comments import Comment
+from models.professional_services import ProfessionalService
+from models.ratings import Rating
+from models.subcategories import SubCategory
+from models.subscriptions import Subscription
+from models.users import User
+
+# Many-to-one and one-to-one relationships are joined into the main SELECT,
+# collections are loaded with one extra "IN" query per relationship so that
+# LIMIT keeps applying to the parent rows.
+
+
+def user_load_options():
+    return [
+        joinedload(User.role),
+        joinedload(User.subscription).joinedload(Subscription.subscription_type),
+        joinedload(User.profile_image),
+    ]
+
+
+def service_load_options():
+    return [
+        joinedload(ProfessionalService.professional).options(*user_load_options()),
+        joinedload(ProfessionalService.subcategory).joinedload(SubCategory.category),
+        joinedload(ProfessionalService.rating_histogram),
+        selectinload(ProfessionalService.images),
+        selectinload(ProfessionalService.work_schedules),
+    ]
+
+
+def comment_load_options():
+    return [
+        joinedload(Comment.user).options(*user_load_options()),
+        joinedload(Comment.professional_service).options(*service_load_options()),
+    ]
+
+
+def rating_load_options():
+    return [
+        joinedload(Rating.user).options(*user_load_options()),
+        joinedload(Rating.professional_service).options(*service_load_options()),
+    ]
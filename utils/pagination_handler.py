@@ -0,0 +1,68 @@
+import base64
+import json
+from typing import List, Optional
+from fastapi import status
+from sqlalchemy import and_, or_
+from custom_exceptions.users_exceptions import GenericException
+
+
+def encode_cursor(values: List) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise GenericException(
+            message="Invalid cursor", code=status.HTTP_400_BAD_REQUEST
+        )
+    return values
+
+
+def apply_keyset(query, keys: List, cursor: Optional[str]):
+    # Rows are ordered by every key descending; the cursor holds the key values
+    # of the last row already served, so the next page starts strictly after it.
+    query = query.order_by(*[key.desc() for key in keys])
+    if not cursor:
+        return query
+
+    values = decode_cursor(cursor, len(keys))
+    conditions = []
+    for position, key in enumerate(keys):
+        equal_prefix = [keys[i] == values[i] for i in range(position)]
+        conditions.append(and_(*equal_prefix, key < values[position]))
+    # The bound on the leading key is implied by the OR, but spelling it out
+    # lets every backend start the index range at the cursor instead of
+    # walking past the rows already served
+    return query.filter(keys[0] <= values[0], or_(*conditions))
+
+
+def fetch_keyset_page(query, keys: List, cursor: Optional[str], limit: int):
+    rows = apply_keyset(query, keys, cursor).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([_key_value(rows[-1], key) for key in keys])
+    return rows, next_cursor
+
+
+def fetch_offset_page(query, keys: List, offset: int, limit: int):
+    rows = apply_keyset(query, keys, None).limit(limit + 1).offset(offset).all()
+
+    # Lets clients switch to keyset mode from any offset page
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([_key_value(rows[-1], key) for key in keys])
+    return rows, next_cursor
+
+
+def _key_value(row, key):
+    return getattr(row, key.key)
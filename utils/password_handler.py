@@ -1,9 +1,26 @@
+import os
+from contextlib import asynccontextmanager
+import anyio
 import bcrypt
+from dotenv import load_dotenv
+from fastapi import status
+from custom_exceptions.users_exceptions import GenericException
 
+load_dotenv()
 
-def hash_password(password):
+# bcrypt releases the GIL, so one thread per core hashes in parallel; empty
+# means one per core
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS") or os.cpu_count() or 1)
+LOGIN_MAX_PENDING = int(os.getenv("LOGIN_MAX_PENDING", 64))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+_hash_limiter = None
+_pending_logins = 0
+
+
+def hash_password(password, rounds: int = BCRYPT_ROUNDS):
     pwd_bytes = password.encode("utf-8")
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds)
     hashed_password = bcrypt.hashpw(password=pwd_bytes, salt=salt)
     return hashed_password
 
@@ -12,3 +29,50 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     password_byte_enc = plain_password.encode("utf-8")
     hashed_password_bytes = hashed_password.encode("utf-8")
     return bcrypt.checkpw(password_byte_enc, hashed_password_bytes)
+
+
+def password_needs_rehash(hashed_password) -> bool:
+    # bcrypt hashes look like $2b$<cost>$<salt and digest>
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode("utf-8")
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _get_hash_limiter():
+    # Created lazily because a limiter needs a running event loop
+    global _hash_limiter
+    if _hash_limiter is None:
+        _hash_limiter = anyio.CapacityLimiter(PASSWORD_HASH_WORKERS)
+    return _hash_limiter
+
+
+async def hash_password_async(password):
+    return await anyio.to_thread.run_sync(
+        hash_password, password, limiter=_get_hash_limiter()
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await anyio.to_thread.run_sync(
+        verify_password, plain_password, hashed_password, limiter=_get_hash_limiter()
+    )
+
+
+@asynccontextmanager
+async def login_slot():
+    # Sheds login bursts early instead of queueing them behind the hash pool
+    global _pending_logins
+    if _pending_logins >= LOGIN_MAX_PENDING:
+        raise GenericException(
+            message="Too many login attempts in progress, try again later",
+            code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
+    _pending_logins += 1
+    try:
+        yield
+    finally:
+        _pending_logins -= 1
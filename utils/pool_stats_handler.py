@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Dict, Type
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Stats outlive pool recreation (engine.dispose), so they are kept per engine
+# name rather than on the pool instance.
+POOL_STATS: Dict[str, "PoolStats"] = {}
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.overflow_max = 0
+
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_get(self, seconds: float, overflow: int):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self.overflow_max = max(self.overflow_max, overflow)
+
+    def snapshot(self, pool: Pool) -> dict:
+        with self._lock:
+            return {
+                "pool": type(pool).__name__,
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "overflow_max": self.overflow_max,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": (
+                    round(self.wait_seconds_total / self.waits * 1000, 3)
+                    if self.waits
+                    else 0.0
+                ),
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            }
+
+
+def instrumented_pool_class(base: Type[Pool], name: str) -> Type[Pool]:
+    # Times how long each checkout waits for a free connection (or for a new
+    # overflow connection to open), which pool events cannot observe.
+    stats = POOL_STATS.setdefault(name, PoolStats(name))
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = base._do_get(self)
+        except exc.TimeoutError:
+            stats.increment("timeouts")
+            raise
+        stats.record_get(time.perf_counter() - started, self.overflow())
+        return record
+
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def listen_pool_events(engine: Engine, name: str):
+    stats = POOL_STATS.setdefault(name, PoolStats(name))
+    for event_name, counter in (
+        ("checkout", "checkouts"),
+        ("checkin", "checkins"),
+        ("connect", "connects"),
+        ("invalidate", "invalidations"),
+        ("soft_invalidate", "soft_invalidations"),
+    ):
+        event.listen(
+            engine, event_name, lambda *args, counter=counter: stats.increment(counter)
+        )
+
+
+def pool_stats(engines: Dict[str, Engine]) -> Dict[str, dict]:
+    return {
+        name: POOL_STATS[name].snapshot(engine.pool)
+        for name, engine in engines.items()
+        if name in POOL_STATS
+    }
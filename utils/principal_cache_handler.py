@@ -0,0 +1,83 @@
+import os
+import threading
+from datetime import datetime
+from typing import NamedTuple, Optional
+from cachetools import TTLCache
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models.roles import Role
+from models.subscriptions import Subscription
+from models.users import User
+
+load_dotenv()
+
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", 4096))
+
+# Keyed by token subject (the email). Invalidation only reaches this worker,
+# other workers pick up changes once the entry expires.
+_principal_cache = TTLCache(
+    maxsize=PRINCIPAL_CACHE_MAX_ENTRIES, ttl=PRINCIPAL_CACHE_TTL_SECONDS
+)
+_principal_cache_lock = threading.Lock()
+
+
+class Principal(NamedTuple):
+    user_id: int
+    email: str
+    role_name: str
+    is_active: bool
+    subscription_end_date: Optional[datetime]
+
+    @property
+    def has_active_subscription(self) -> bool:
+        return (
+            self.subscription_end_date is not None
+            and self.subscription_end_date > datetime.now()
+        )
+
+
+def load_principal(db: Session, email: str) -> Optional[Principal]:
+    # The only way a principal is built. A user may have several subscription
+    # rows; the one that ends last decides, whatever order the database
+    # returns them in.
+    subscription_end_date = (
+        select(func.max(Subscription.end_date))
+        .where(Subscription.user_id == User.id)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    row = (
+        db.query(
+            User.id,
+            User.email,
+            Role.name,
+            User.is_active,
+            subscription_end_date,
+        )
+        .join(Role, Role.id == User.role_id)
+        .filter(User.email == email)
+        .first()
+    )
+    return Principal(*row) if row else None
+
+
+def cache_principal(principal: Principal):
+    with _principal_cache_lock:
+        _principal_cache[principal.email] = principal
+
+
+def get_principal(db: Session, email: str) -> Optional[Principal]:
+    with _principal_cache_lock:
+        principal = _principal_cache.get(email)
+    if principal is None:
+        principal = load_principal(db, email)
+        if principal is not None:
+            cache_principal(principal)
+    return principal
+
+
+def invalidate_principal(email: str):
+    with _principal_cache_lock:
+        _principal_cache.pop(email, None)
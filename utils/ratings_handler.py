@@ -0,0 +1,136 @@
+import math
+from collections import Counter
+from typing import Dict, Iterable
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from models.professional_services import ProfessionalService
+from models.rating_histograms import RatingHistogram
+from models.ratings import Rating
+
+
+def apply_ratings(
+    db: Session, service_id: int, rating_sum: float, rating_count: int = 1
+):
+    # One atomic UPDATE, so concurrent raters never overwrite each other.
+    # average_rating goes first: MySQL evaluates SET clauses left to right
+    # against the already updated values, the other backends use the old row.
+    db.execute(
+        update(ProfessionalService)
+        .where(ProfessionalService.id == service_id)
+        .ordered_values(
+            (
+                ProfessionalService.average_rating,
+                (ProfessionalService.rating_sum + rating_sum)
+                / (ProfessionalService.rating_count + rating_count),
+            ),
+            (
+                ProfessionalService.rating_sum,
+                ProfessionalService.rating_sum + rating_sum,
+            ),
+            (
+                ProfessionalService.rating_count,
+                ProfessionalService.rating_count + rating_count,
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def star_bucket(value: float) -> int:
+    return min(5, max(1, math.floor(value + 0.5)))
+
+
+def star_counts(values: Iterable[float]) -> Dict[int, int]:
+    return Counter(star_bucket(value) for value in values)
+
+
+def apply_histogram(db: Session, service_id: int, counts: Dict[int, int]):
+    columns = {
+        f"stars_{star}": getattr(RatingHistogram, f"stars_{star}") + count
+        for star, count in counts.items()
+    }
+    result = db.execute(
+        update(RatingHistogram)
+        .where(RatingHistogram.professional_service_id == service_id)
+        .values(**columns)
+        .execution_options(synchronize_session=False)
+    )
+    # Services created before the histogram table existed have no row yet
+    if result.rowcount == 0:
+        db.execute(
+            insert(RatingHistogram).values(
+                professional_service_id=service_id,
+                **{f"stars_{star}": counts.get(star, 0) for star in range(1, 6)},
+            )
+        )
+
+
+def add_histogram(db: Session, service: ProfessionalService):
+    db.add(
+        RatingHistogram(
+            professional_service_id=service.id,
+            stars_1=0,
+            stars_2=0,
+            stars_3=0,
+            stars_4=0,
+            stars_5=0,
+        )
+    )
+
+
+def rebuild_rating_histograms(db: Session):
+    counts_by_service = {}
+    for service_id, value in db.query(Rating.professional_service_id, Rating.rating):
+        counts_by_service.setdefault(service_id, Counter())[star_bucket(value)] += 1
+
+    db.execute(delete(RatingHistogram))
+    rows = [
+        {
+            "professional_service_id": service_id,
+            **{
+                f"stars_{star}": counts_by_service.get(service_id, {}).get(star, 0)
+                for star in range(1, 6)
+            },
+        }
+        for (service_id,) in db.query(ProfessionalService.id)
+    ]
+    if rows:
+        db.execute(insert(RatingHistogram), rows)
+    db.commit()
+
+
+def reconcile_rating_aggregates(db: Session):
+    rating_sum = (
+        select(func.coalesce(func.sum(Rating.rating), 0.0))
+        .where(Rating.professional_service_id == ProfessionalService.id)
+        .scalar_subquery()
+    )
+    rating_count = (
+        select(func.count(Rating.id))
+        .where(Rating.professional_service_id == ProfessionalService.id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(ProfessionalService)
+        .ordered_values(
+            (
+                ProfessionalService.average_rating,
+                case((rating_count > 0, rating_sum / rating_count), else_=0.0),
+            ),
+            (ProfessionalService.rating_sum, rating_sum),
+            (ProfessionalService.rating_count, rating_count),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+if __name__ == "__main__":
+    from config.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        reconcile_rating_aggregates(session)
+        rebuild_rating_histograms(session)
+    finally:
+        session.close()
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi.logger import logger
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from config.database import SessionLocal
+from models.revoked_tokens import RevokedToken
+
+load_dotenv()
+
+REVOCATION_REFRESH_SECONDS = int(os.getenv("REVOCATION_REFRESH_SECONDS", 5))
+REVOCATION_PURGE_SECONDS = int(os.getenv("REVOCATION_PURGE_SECONDS", 3600))
+# How far back each refresh looks past the previous one. Must cover the
+# longest logout transaction plus the clock skew between hosts.
+REVOCATION_OVERLAP_SECONDS = int(os.getenv("REVOCATION_OVERLAP_SECONDS", 60))
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def token_expires_at(payload: dict) -> datetime:
+    return datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
+
+
+class RevocationSet:
+    # jti -> expires_at for every revoked token that has not expired yet.
+    # Rows are only deleted once their token is expired, so a hit here is
+    # final and a miss only has to wait for the next incremental refresh to
+    # see revocations made by other workers.
+    #
+    # Refreshes select by revoked_at rather than by id: concurrent logouts can
+    # commit out of id order, and a row that shows up below an id already
+    # seen would otherwise never be loaded.
+
+    def __init__(self):
+        self._expires_at = {}
+        self._loaded_since = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._expires_at)
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._expires_at
+
+    def add(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self._expires_at[jti] = expires_at
+
+    def load(self, db: Session, full: bool = False):
+        # Fetches rows revoked since shortly before the previous load, or every
+        # unexpired row on the first and full loads
+        started = _utc_now()
+        query = db.query(RevokedToken.jti, RevokedToken.expires_at).filter(
+            RevokedToken.expires_at > started
+        )
+        if self._loaded_since is not None and not full:
+            query = query.filter(
+                RevokedToken.revoked_at
+                >= self._loaded_since - timedelta(seconds=REVOCATION_OVERLAP_SECONDS)
+            )
+        rows = query.all()
+        with self._lock:
+            for row in rows:
+                self._expires_at[row.jti] = row.expires_at
+            self._loaded_since = started
+
+    def purge(self, now: datetime):
+        with self._lock:
+            self._expires_at = {
+                jti: expires_at
+                for jti, expires_at in self._expires_at.items()
+                if expires_at > now
+            }
+
+
+revoked_tokens = RevocationSet()
+
+
+def is_token_revoked(jti: Optional[str]) -> bool:
+    # Tokens issued before jti was introduced cannot be revoked
+    return jti is not None and jti in revoked_tokens
+
+
+def revoke_token(db: Session, payload: dict):
+    jti = payload.get("jti")
+    if jti is None:
+        return
+    expires_at = token_expires_at(payload)
+    db.add(RevokedToken(jti=jti, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Already revoked
+        db.rollback()
+    revoked_tokens.add(jti, expires_at)
+
+
+def load_revoked_tokens(full: bool = False):
+    db = SessionLocal()
+    try:
+        revoked_tokens.load(db, full)
+    finally:
+        db.close()
+
+
+def purge_expired_tokens():
+    now = _utc_now()
+    db = SessionLocal()
+    try:
+        deleted = (
+            db.query(RevokedToken)
+            .filter(RevokedToken.expires_at <= now)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+    revoked_tokens.purge(now)
+    return deleted
+
+
+async def refresh_revoked_tokens_periodically():
+    last_purge = asyncio.get_running_loop().time()
+    while True:
+        await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+        try:
+            await run_in_threadpool(load_revoked_tokens)
+            if (
+                asyncio.get_running_loop().time() - last_purge
+                >= REVOCATION_PURGE_SECONDS
+            ):
+                await run_in_threadpool(purge_expired_tokens)
+                # Backstop for anything a window missed, e.g. a host whose
+                # clock ran further behind than the overlap
+                await run_in_threadpool(load_revoked_tokens, True)
+                last_purge = asyncio.get_running_loop().time()
+        except Exception as exc:
+            logger.error(f"Refreshing revoked tokens failed: {exc}")
@@ -0,0 +1,135 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import List
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session, with_expression
+from models.professional_services import ProfessionalService
+from models.service_search_tokens import ServiceSearchToken
+
+STOP_WORDS = {
+    "a",
+    "al",
+    "con",
+    "de",
+    "del",
+    "el",
+    "en",
+    "la",
+    "las",
+    "lo",
+    "los",
+    "para",
+    "por",
+    "que",
+    "un",
+    "una",
+    "y",
+    "the",
+    "and",
+    "of",
+    "in",
+}
+
+# A match in the name counts more than one in the city or the description
+FIELD_WEIGHTS = (("name", 3), ("city", 2), ("description", 1))
+
+MAX_QUERY_TOKENS = 8
+
+
+def fold_text(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token[:50]
+        for token in re.findall(r"[a-z0-9]+", fold_text(text))
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def uses_native_fulltext(db: Session) -> bool:
+    return db.bind.dialect.name == "mysql"
+
+
+def index_service(db: Session, service: ProfessionalService):
+    # MySQL keeps its own FULLTEXT index on the table
+    if uses_native_fulltext(db):
+        return
+
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(getattr(service, field)):
+            weights[token] += weight
+
+    db.execute(
+        delete(ServiceSearchToken).where(ServiceSearchToken.service_id == service.id)
+    )
+    if weights:
+        db.execute(
+            insert(ServiceSearchToken),
+            [
+                {"service_id": service.id, "token": token, "weight": weight}
+                for token, weight in weights.items()
+            ],
+        )
+
+
+def rebuild_search_index(db: Session):
+    for service in db.query(ProfessionalService).all():
+        index_service(db, service)
+    db.commit()
+
+
+def normalize_query(q: str) -> str:
+    return " ".join(tokenize(q)[:MAX_QUERY_TOKENS])
+
+
+def filter_by_text(db: Session, query, q: str):
+    if uses_native_fulltext(db):
+        return query.filter(_fulltext_match(q) > 0)
+
+    matching_ids = select(ServiceSearchToken.service_id).where(
+        ServiceSearchToken.token.in_(tokenize(q)[:MAX_QUERY_TOKENS])
+    )
+    return query.filter(ProfessionalService.id.in_(matching_ids))
+
+
+def with_search_score(db: Session, query, q: str):
+    if uses_native_fulltext(db):
+        score = _fulltext_match(q)
+    else:
+        score = (
+            select(func.sum(ServiceSearchToken.weight))
+            .where(
+                ServiceSearchToken.service_id == ProfessionalService.id,
+                ServiceSearchToken.token.in_(tokenize(q)[:MAX_QUERY_TOKENS]),
+            )
+            .scalar_subquery()
+        )
+
+    score = score.label("search_score")
+    query = query.options(with_expression(ProfessionalService.search_score, score))
+    return query, score
+
+
+def _fulltext_match(q: str):
+    return match(
+        ProfessionalService.name,
+        ProfessionalService.description,
+        ProfessionalService.city,
+        against=q,
+    )
+
+
+if __name__ == "__main__":
+    from config.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        rebuild_search_index(session)
+    finally:
+        session.close()
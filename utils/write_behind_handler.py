@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import tempfile
+from collections import defaultdict
+from typing import List, Tuple
+from dotenv import load_dotenv
+from fastapi import status
+from fastapi.logger import logger
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+from config.database import SessionLocal
+from custom_exceptions.users_exceptions import GenericException
+from models.comments import Comment
+from models.ratings import Rating
+from utils.leaderboard_handler import record_rating
+from utils.ratings_handler import apply_histogram, apply_ratings, star_counts
+
+load_dotenv()
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", 1000))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 200))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", 0.5))
+WRITE_BEHIND_RETRY_AFTER_SECONDS = int(os.getenv("WRITE_BEHIND_RETRY_AFTER_SECONDS", 2))
+# A failed batch is retried this many times in all, waiting twice as long
+# before each retry, so a short database outage loses nothing
+WRITE_BEHIND_FLUSH_ATTEMPTS = int(os.getenv("WRITE_BEHIND_FLUSH_ATTEMPTS", 3))
+WRITE_BEHIND_BACKOFF_SECONDS = float(os.getenv("WRITE_BEHIND_BACKOFF_SECONDS", 0.5))
+# Items that still cannot be written were already acknowledged with a 202, so
+# they are appended here as JSON lines and can be replayed with
+# python -m utils.write_behind_handler
+WRITE_BEHIND_DEAD_LETTER_FILE = os.getenv("WRITE_BEHIND_DEAD_LETTER_FILE") or (
+    os.path.join(tempfile.gettempdir(), "proserfy-write-behind-dead-letter.jsonl")
+)
+
+COMMENT = "comment"
+RATING = "rating"
+
+
+class WriteBehindBuffer:
+    # Accepted comments and ratings wait in a bounded queue and are written in
+    # batches by a single background task. Everything here runs on the event
+    # loop except _flush, which runs in the threadpool.
+
+    def __init__(self, max_size: int, batch_size: int, flush_seconds: float):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = None
+        self._task = None
+        self._pending_ratings = set()
+        self.flushed = 0
+        self.retries = 0
+        self.dead_lettered = 0
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Drain whatever was accepted before shutdown
+        while not self._queue.empty():
+            await self._flush_batch(self._take_batch(self.batch_size))
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "flushed": self.flushed,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+        }
+
+    def has_pending_rating(self, user_id: int, service_id: int) -> bool:
+        return (user_id, service_id) in self._pending_ratings
+
+    def submit_comment(self, values: dict):
+        self._submit((COMMENT, values))
+
+    def submit_rating(self, values: dict):
+        self._submit((RATING, values))
+        self._pending_ratings.add(
+            (values["user_id"], values["professional_service_id"])
+        )
+
+    def _submit(self, item):
+        if self._queue is None:
+            raise GenericException(
+                message="Write buffer is not running",
+                code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            raise GenericException(
+                message="Too many pending writes, try again later",
+                code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(WRITE_BEHIND_RETRY_AFTER_SECONDS)},
+            )
+
+    def _take_batch(self, size: int) -> List:
+        batch = []
+        while len(batch) < size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            try:
+                # Give a burst a moment to accumulate into one batch
+                await asyncio.sleep(self.flush_seconds)
+            finally:
+                batch = [first] + self._take_batch(self.batch_size - 1)
+                await self._flush_batch(batch)
+
+    async def _flush_batch(self, batch: List):
+        if not batch:
+            return
+        try:
+            if await self._flush_with_retries(batch):
+                return
+            # One bad row fails its whole batch, so the others are written
+            # one by one and only the ones that still fail are set aside
+            failed = []
+            for item in batch:
+                try:
+                    await run_in_threadpool(_flush, [item])
+                    self.flushed += 1
+                except Exception as exc:
+                    logger.error(f"Write-behind item failed: {exc}")
+                    failed.append(item)
+            if failed:
+                await run_in_threadpool(dead_letter, failed)
+                self.dead_lettered += len(failed)
+        finally:
+            for kind, values in batch:
+                if kind == RATING:
+                    self._pending_ratings.discard(
+                        (values["user_id"], values["professional_service_id"])
+                    )
+
+    async def _flush_with_retries(self, batch: List) -> bool:
+        for attempt in range(WRITE_BEHIND_FLUSH_ATTEMPTS):
+            if attempt:
+                self.retries += 1
+                await asyncio.sleep(WRITE_BEHIND_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            try:
+                await run_in_threadpool(_flush, batch)
+                self.flushed += len(batch)
+                return True
+            except Exception as exc:
+                logger.error(
+                    f"Write-behind batch of {len(batch)} failed "
+                    f"(attempt {attempt + 1} of {WRITE_BEHIND_FLUSH_ATTEMPTS}): {exc}"
+                )
+        return False
+
+
+def _flush(batch: List):
+    comments = [values for kind, values in batch if kind == COMMENT]
+    ratings = [values for kind, values in batch if kind == RATING]
+
+    ratings_by_service = defaultdict(list)
+    for values in ratings:
+        ratings_by_service[values["professional_service_id"]].append(values["rating"])
+
+    db = SessionLocal()
+    try:
+        if comments:
+            db.execute(insert(Comment), comments)
+        if ratings:
+            db.execute(insert(Rating), ratings)
+        for service_id, values in ratings_by_service.items():
+            apply_ratings(db, service_id, sum(values), len(values))
+            apply_histogram(db, service_id, star_counts(values))
+            record_rating(db, service_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def dead_letter(items: List, path: str = None):
+    lines = [json.dumps({"kind": kind, "values": values}) for kind, values in items]
+    try:
+        with open(path or WRITE_BEHIND_DEAD_LETTER_FILE, "a") as dead_letter_file:
+            dead_letter_file.writelines(f"{line}\n" for line in lines)
+    except OSError as exc:
+        # Still replayable: each line is exactly what the file would hold
+        logger.error(f"Could not write the write-behind dead letter file: {exc}")
+        for line in lines:
+            logger.error(f"Write-behind dead letter: {line}")
+        return
+    logger.error(f"Set aside {len(items)} write-behind items in the dead letter file")
+
+
+def replay_dead_letters(path: str = None) -> Tuple[int, int]:
+    # Writes every set-aside item again; the ones that still fail, e.g. a
+    # rating the user has since made directly, go back into the file
+    path = path or WRITE_BEHIND_DEAD_LETTER_FILE
+    if not os.path.exists(path):
+        return 0, 0
+    replaying = f"{path}.replaying"
+    os.replace(path, replaying)
+    with open(replaying) as dead_letter_file:
+        items = [
+            (item["kind"], item["values"])
+            for item in map(json.loads, filter(str.strip, dead_letter_file))
+        ]
+
+    failed = []
+    for item in items:
+        try:
+            _flush([item])
+        except Exception as exc:
+            logger.error(f"Replaying write-behind item failed: {exc}")
+            failed.append(item)
+    if failed:
+        dead_letter(failed, path)
+    os.remove(replaying)
+    return len(items) - len(failed), len(failed)
+
+
+write_behind = WriteBehindBuffer(
+    WRITE_BEHIND_MAX_QUEUE, WRITE_BEHIND_BATCH_SIZE, WRITE_BEHIND_FLUSH_SECONDS
+)
+
+
+if __name__ == "__main__":
+    import main  # noqa: F401 registers every mapper
+
+    replayed, failed = replay_dead_letters()
+    print(f"Replayed {replayed} write-behind items, {failed} still failing")